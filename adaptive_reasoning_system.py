@@ -14,28 +14,84 @@
 """
 
 import re
+import sys
 import json
 import time
 import logging
-from typing import Dict, List, Tuple, Optional, Any
+import functools
+import itertools
+import threading
+from collections import Counter, OrderedDict
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional, Any, Iterable
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
+try:
+    import ahocorasick  # pyahocorasick，可选依赖：单次扫描统计全部关键词
+except ImportError:
+    ahocorasick = None
+
+try:
+    import numpy as np  # 可选依赖：批量任务的向量化复杂度计算
+except ImportError:
+    np = None
+
+try:
+    from numba import njit  # 可选依赖：JIT编译复杂度数值核心
+except ImportError:
+    njit = None
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-
-class ReasoningMode(Enum):
-    """推理模式枚举"""
+# 代码特征正则（模块加载时合并为单个正则，一次扫描完成检测）
+_CODE_RE = re.compile("|".join(f"(?:{pattern})" for pattern in [
+    r'```[\s\S]*?```',  # 代码块
+    r'`[^`]+`',         # 内联代码
+    r'def\s+\w+\s*\(',  # Python函数定义
+    r'function\s+\w+',  # JavaScript函数
+    r'class\s+\w+',     # 类定义
+    r'#include\s*<',    # C/C++头文件
+    r'import\s+\w+',    # import语句
+]), re.IGNORECASE)
+
+# 数学特征正则
+_MATH_RE = re.compile("|".join(f"(?:{pattern})" for pattern in [
+    r'\$.*?\$',         # LaTeX数学公式
+    r'\\[a-zA-Z]+',     # LaTeX命令
+    r'[∑∏∫∆∇]',        # 数学符号
+    r'\b\d+\s*[+\-*/]\s*\d+',  # 算术表达式
+    r'[=<>≤≥≠]',       # 比较符号
+    r'[∈∉⊂⊃∩∪]',      # 集合符号
+]))
+
+
+def _complexity_core(text_len: int, prog_count: int, math_count: int, verif_count: int,
+                     has_prove: int, has_algo: int, has_opt: int) -> float:
+    """复杂度分数的数值核心（纯算术，不含字符串/正则操作，可被Numba编译）"""
+    base_score = min(text_len / 50.0, 50.0)  # 基于文本长度，最高50分
+    keyword_score = min(prog_count * 2 + math_count * 3 + verif_count * 4, 30)  # 最高30分
+    special_score = min(has_prove * 15 + has_algo * 10 + has_opt * 10, 20)  # 最高20分
+    return min(base_score + keyword_score + special_score, 100.0)
+
+
+if njit is not None:
+    _complexity_core = njit(cache=True)(_complexity_core)
+
+
+class ReasoningMode(str, Enum):
+    """推理模式枚举（继承 str，成员与其字符串值相等，可直接用作字典键或JSON值）"""
     NON_THINKING = "non_thinking"      # 非思考模式
     SIMPLIFIED = "simplified"          # 简化思考模式
     FULL_THINKING = "full_thinking"    # 完整思考模式
 
 
-class TaskType(Enum):
-    """任务类型枚举"""
+class TaskType(str, Enum):
+    """任务类型枚举（继承 str，同上）"""
     PROGRAMMING = "programming"        # 编程任务
     MATH_REASONING = "math_reasoning"  # 数学推理
     SIMPLE_QA = "simple_qa"           # 简单问答
@@ -44,66 +100,237 @@ class TaskType(Enum):
     UNKNOWN = "unknown"               # 未知类型
 
 
-@dataclass
+# Python 3.10+ 的数据类使用 __slots__（减少大批量任务时的内存占用），旧版本退回普通数据类
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 枚举成员 → 统计数组下标（按定义顺序）
+_MODE_INDEX = {mode: index for index, mode in enumerate(ReasoningMode)}
+_TASK_TYPE_INDEX = {task_type: index for index, task_type in enumerate(TaskType)}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class TaskFeatures:
-    """任务特征"""
+    """任务特征（不可变，分析结果会被缓存并在相同任务间共享）"""
     contains_code: bool = False        # 是否包含代码
     contains_math: bool = False        # 是否包含数学符号
     complexity_score: float = 0.0     # 复杂度分数 (0-100)
     requires_verification: bool = False # 是否需要逐步验证
     task_type: TaskType = TaskType.UNKNOWN
-    keywords_count: Dict[str, int] = None
+    keywords_count: Dict[str, int] = field(default_factory=dict)  # 缓存共享，调用方只读
 
-    def __post_init__(self):
-        if self.keywords_count is None:
-            self.keywords_count = {}
 
-
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ReasoningResult:
-    """推理结果"""
+    """推理结果（构造后不可变）"""
     task_id: str
     reasoning_mode: ReasoningMode
     response: str
     execution_time: float
     confidence_score: float
-    metadata: Dict[str, Any] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可直接JSON序列化的字典（不含 metadata 中的特征对象）"""
+        return {
+            "task_id": self.task_id,
+            "reasoning_mode": self.reasoning_mode.value,
+            "response": self.response,
+            "execution_time": self.execution_time,
+            "confidence_score": self.confidence_score,
+        }
+
 
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+class KeywordTrie:
+    """字符级前缀树关键词匹配器（无第三方依赖，适用于中文等无空格分隔的关键词）"""
+
+    _END = None  # 节点中记录 (类别, 关键词) 列表的键，不会与单个字符冲突
+
+    def __init__(self, keyword_groups: Dict[str, frozenset]):
+        self.categories = tuple(keyword_groups)
+        self.root: Dict[Any, Any] = {}
+        for category, keywords in keyword_groups.items():
+            for keyword in keywords:
+                node = self.root
+                for char in keyword:
+                    node = node.setdefault(char, {})
+                node.setdefault(self._END, []).append((category, keyword))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """从每个起点沿前缀树匹配，统计各类别命中的不同关键词个数"""
+        root = self.root
+        end = self._END
+        length = len(text)
+        hits = set()
+
+        for start in range(length):
+            node = root.get(text[start])
+            position = start + 1
+            while node is not None:
+                entries = node.get(end)
+                if entries:
+                    hits.update(entries)
+                if position >= length:
+                    break
+                node = node.get(text[position])
+                position += 1
+
+        counts = dict.fromkeys(self.categories, 0)
+        for category, _ in hits:
+            counts[category] += 1
+        return counts
+
+
+@functools.lru_cache(maxsize=None)
+def _build_keyword_matchers(keyword_groups: Tuple[Tuple[str, frozenset], ...]):
+    """构建关键词匹配器：返回 (Aho–Corasick自动机, None)，未安装pyahocorasick时返回 (None, 前缀树)"""
+    if ahocorasick is None:
+        return None, KeywordTrie(dict(keyword_groups))
+
+    # 同一关键词可能属于多个类别（如"证明"同时属于数学和验证）
+    entries: Dict[str, List[Tuple[str, str]]] = {}
+    for category, keywords in keyword_groups:
+        for keyword in keywords:
+            entries.setdefault(keyword, []).append((category, keyword))
+
+    automaton = ahocorasick.Automaton()
+    for keyword, values in entries.items():
+        automaton.add_word(keyword, tuple(values))
+    automaton.make_automaton()
+    return automaton, None
 
 
 class TaskAnalyzer:
     """任务特征分析器"""
 
+    # 编程相关关键词
+    PROGRAMMING_KEYWORDS = frozenset({
+        'function', 'class', 'def', 'import', 'return', 'if', 'else', 'for', 'while',
+        'try', 'except', 'print', 'input', 'list', 'dict', 'array', 'variable',
+        'algorithm', 'code', 'program', 'script', 'debug', 'compile', 'execute',
+        '函数', '类', '变量', '算法', '代码', '程序', '脚本', '调试', '编译', '执行'
+    })
+
+    # 数学相关关键词
+    MATH_KEYWORDS = frozenset({
+        'equation', 'formula', 'calculate', 'solve', 'proof', 'theorem', 'derivative',
+        'integral', 'matrix', 'vector', 'probability', 'statistics', 'geometry',
+        '方程', '公式', '计算', '求解', '证明', '定理', '导数', '积分', '矩阵', '向量',
+        '概率', '统计', '几何'
+    })
+
+    # 需要验证的关键词
+    VERIFICATION_KEYWORDS = frozenset({
+        'prove', 'verify', 'check', 'validate', 'confirm', 'ensure', 'step by step',
+        'reasoning', 'logic', 'analysis', 'derivation',
+        '证明', '验证', '检查', '确认', '逐步', '推理', '逻辑', '分析', '推导'
+    })
+
+    # 特殊模式关键词（用于复杂度加权和验证判断）
+    SPECIAL_KEYWORDS = {
+        'prove': frozenset({'证明', 'prove'}),
+        'algorithm': frozenset({'算法', 'algorithm'}),
+        'optimize': frozenset({'优化', 'optimize'}),
+        'step': frozenset({'步骤', 'step'}),
+    }
+
+    # 特征分析结果缓存（analyze_task 与 analyze_tasks 共用）的最大条目数
+    ANALYSIS_CACHE_SIZE = 4096
+
+    # 未安装pyahocorasick时，低于该长度的文本使用前缀树匹配（实测约50字符为分界点）
+    _TRIE_MAX_LENGTH = 48
+
     def __init__(self):
-        # 编程相关关键词
-        self.programming_keywords = {
-            'function', 'class', 'def', 'import', 'return', 'if', 'else', 'for', 'while',
-            'try', 'except', 'print', 'input', 'list', 'dict', 'array', 'variable',
-            'algorithm', 'code', 'program', 'script', 'debug', 'compile', 'execute',
-            '函数', '类', '变量', '算法', '代码', '程序', '脚本', '调试', '编译', '执行'
+        # 按类别汇总的关键词表（子类可覆盖上面的类属性来定制关键词）
+        self.keyword_groups = {
+            'programming': self.PROGRAMMING_KEYWORDS,
+            'math': self.MATH_KEYWORDS,
+            'verification': self.VERIFICATION_KEYWORDS,
+            **self.SPECIAL_KEYWORDS,
         }
+        # 匹配器只依赖关键词表，关键词表相同的分析器实例共用同一份
+        self._automaton, self._trie = _build_keyword_matchers(
+            tuple((category, frozenset(keywords)) for category, keywords in self.keyword_groups.items())
+        )
 
-        # 数学相关关键词
-        self.math_keywords = {
-            'equation', 'formula', 'calculate', 'solve', 'proof', 'theorem', 'derivative',
-            'integral', 'matrix', 'vector', 'probability', 'statistics', 'geometry',
-            '方程', '公式', '计算', '求解', '证明', '定理', '导数', '积分', '矩阵', '向量',
-            '概率', '统计', '几何'
-        }
+        # 特征分析只依赖输入文本，重复的任务文本直接命中缓存（单个与批量分析共用同一份LRU）
+        self._feature_cache: "OrderedDict[str, TaskFeatures]" = OrderedDict()
+        self._feature_cache_lock = threading.Lock()
 
-        # 需要验证的关键词
-        self.verification_keywords = {
-            'prove', 'verify', 'check', 'validate', 'confirm', 'ensure', 'step by step',
-            'reasoning', 'logic', 'analysis', 'derivation',
-            '证明', '验证', '检查', '确认', '逐步', '推理', '逻辑', '分析', '推导'
-        }
+    def warm_up(self):
+        """预先触发复杂度数值核心的JIT编译（或加载编译缓存），避免首个任务承担编译耗时"""
+        _complexity_core(0, 0, 0, 0, 0, 0, 0)
 
     def analyze_task(self, task_text: str) -> TaskFeatures:
+        """分析任务特征（带LRU缓存）"""
+        with self._feature_cache_lock:
+            features = self._feature_cache.get(task_text)
+            if features is not None:
+                self._feature_cache.move_to_end(task_text)
+                return features
+
+        features = self._analyze_uncached(task_text)
+        self._cache_features({task_text: features})
+        return features
+
+    def _cache_features(self, features_by_text: Dict[str, TaskFeatures]):
+        """写入特征缓存（超出容量时淘汰最久未使用的条目）"""
+        cache = self._feature_cache
+        with self._feature_cache_lock:
+            cache.update(features_by_text)
+            for text in features_by_text:
+                cache.move_to_end(text)
+            while len(cache) > self.ANALYSIS_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    def _analyze_uncached(self, task_text: str) -> TaskFeatures:
         """分析任务特征"""
-        task_text_lower = task_text.lower()
+        # 统计关键词
+        keyword_counts = self._count_keywords(task_text.lower())
+
+        # 计算复杂度分数
+        complexity_score = self._calculate_complexity(task_text, keyword_counts)
+
+        return self._build_features(task_text, keyword_counts, complexity_score)
+
+    def analyze_tasks(self, task_texts: List[str]) -> List[TaskFeatures]:
+        """批量分析任务特征（先查LRU缓存，未命中的文本在整个批次上向量化计算后写回缓存）"""
+        # 批次内重复的文本只查找/分析一次，结果再按原顺序分发回去
+        features_by_text: Dict[str, TaskFeatures] = {}
+        misses = []
+        with self._feature_cache_lock:
+            cache = self._feature_cache
+            for text in dict.fromkeys(task_texts):
+                features = cache.get(text)
+                if features is None:
+                    misses.append(text)
+                else:
+                    cache.move_to_end(text)
+                    features_by_text[text] = features
+
+        if misses:
+            counts_list = [self._count_keywords(text.lower()) for text in misses]
+
+            if np is None:
+                scores = [self._calculate_complexity(text, keyword_counts)
+                          for text, keyword_counts in zip(misses, counts_list)]
+            else:
+                scores = self._calculate_complexity_batch(misses, counts_list)
+
+            computed = {
+                text: self._build_features(text, keyword_counts, score)
+                for text, keyword_counts, score in zip(misses, counts_list, scores)
+            }
+            self._cache_features(computed)
+            features_by_text.update(computed)
+
+        return [features_by_text[text] for text in task_texts]
+
+    def _build_features(self, task_text: str, keyword_counts: Dict[str, int],
+                        complexity_score: float) -> TaskFeatures:
+        """根据关键词统计和复杂度分数构造任务特征"""
+        programming_count = keyword_counts['programming']
+        math_count = keyword_counts['math']
+        verification_count = keyword_counts['verification']
 
         # 检测是否包含代码
         contains_code = self._detect_code(task_text)
@@ -111,27 +338,15 @@ class TaskAnalyzer:
         # 检测是否包含数学符号
         contains_math = self._detect_math(task_text)
 
-        # 统计关键词
-        programming_count = sum(1 for keyword in self.programming_keywords
-                               if keyword in task_text_lower)
-        math_count = sum(1 for keyword in self.math_keywords
-                        if keyword in task_text_lower)
-        verification_count = sum(1 for keyword in self.verification_keywords
-                               if keyword in task_text_lower)
-
-        # 计算复杂度分数
-        complexity_score = self._calculate_complexity(
-            task_text, programming_count, math_count, verification_count
-        )
-
         # 判断是否需要验证
         requires_verification = (verification_count > 0 or
                                math_count > programming_count or
-                               '步骤' in task_text or 'step' in task_text_lower)
+                               keyword_counts['step'] > 0)
 
         # 确定任务类型
         task_type = self._determine_task_type(
-            programming_count, math_count, verification_count, contains_code
+            programming_count, math_count, verification_count, contains_code,
+            algo_hit=keyword_counts['algorithm'] > 0
         )
 
         return TaskFeatures(
@@ -147,67 +362,71 @@ class TaskAnalyzer:
             }
         )
 
+    def _count_keywords(self, text_lower: str) -> Dict[str, int]:
+        """统计各类别命中的不同关键词个数"""
+        if self._automaton is None:
+            # 短文本用前缀树单次遍历；长文本时逐关键词的C层子串查找更快
+            if len(text_lower) < self._TRIE_MAX_LENGTH:
+                return self._trie.count(text_lower)
+
+            # map + str.__contains__ 在C层完成逐关键词判断，避免生成器的逐项开销
+            contains = text_lower.__contains__
+            return {
+                category: sum(map(contains, keywords))
+                for category, keywords in self.keyword_groups.items()
+            }
+
+        # 单次遍历文本，按类别去重计数
+        hits = set()
+        for _, values in self._automaton.iter(text_lower):
+            hits.update(values)
+
+        counts = dict.fromkeys(self.keyword_groups, 0)
+        for category, _ in hits:
+            counts[category] += 1
+        return counts
+
     def _detect_code(self, text: str) -> bool:
         """检测是否包含代码"""
-        code_patterns = [
-            r'```[\s\S]*?```',  # 代码块
-            r'`[^`]+`',         # 内联代码
-            r'def\s+\w+\s*\(',  # Python函数定义
-            r'function\s+\w+',  # JavaScript函数
-            r'class\s+\w+',     # 类定义
-            r'#include\s*<',    # C/C++头文件
-            r'import\s+\w+',    # import语句
-        ]
-
-        for pattern in code_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        return _CODE_RE.search(text) is not None
 
     def _detect_math(self, text: str) -> bool:
         """检测是否包含数学符号"""
-        math_patterns = [
-            r'\$.*?\$',         # LaTeX数学公式
-            r'\\[a-zA-Z]+',     # LaTeX命令
-            r'[∑∏∫∆∇]',        # 数学符号
-            r'\b\d+\s*[+\-*/]\s*\d+',  # 算术表达式
-            r'[=<>≤≥≠]',       # 比较符号
-            r'[∈∉⊂⊃∩∪]',      # 集合符号
-        ]
-
-        for pattern in math_patterns:
-            if re.search(pattern, text):
-                return True
-        return False
-
-    def _calculate_complexity(self, text: str, prog_count: int,
-                            math_count: int, verif_count: int) -> float:
-        """计算任务复杂度分数 (0-100)"""
-        base_score = min(len(text) / 50, 50)  # 基于文本长度，最高50分
-
-        # 关键词加权
-        keyword_score = (prog_count * 2 + math_count * 3 + verif_count * 4)
-        keyword_score = min(keyword_score, 30)  # 最高30分
+        return _MATH_RE.search(text) is not None
 
-        # 特殊模式加权
-        special_score = 0
-        if '证明' in text or 'prove' in text.lower():
-            special_score += 15
-        if '算法' in text or 'algorithm' in text.lower():
-            special_score += 10
-        if '优化' in text or 'optimize' in text.lower():
-            special_score += 10
-
-        special_score = min(special_score, 20)  # 最高20分
+    def _calculate_complexity(self, text: str, keyword_counts: Dict[str, int]) -> float:
+        """计算任务复杂度分数 (0-100)"""
+        return _complexity_core(
+            len(text),
+            keyword_counts['programming'],
+            keyword_counts['math'],
+            keyword_counts['verification'],
+            int(keyword_counts['prove'] > 0),
+            int(keyword_counts['algorithm'] > 0),
+            int(keyword_counts['optimize'] > 0),
+        )
 
-        total_score = base_score + keyword_score + special_score
-        return min(total_score, 100)
+    def _calculate_complexity_batch(self, texts: List[str],
+                                    counts_list: List[Dict[str, int]]) -> List[float]:
+        """用NumPy一次性计算整批任务的复杂度分数，与 _complexity_core 逐项等价"""
+        columns = np.array([
+            (len(text), counts['programming'], counts['math'], counts['verification'],
+             counts['prove'] > 0, counts['algorithm'] > 0, counts['optimize'] > 0)
+            for text, counts in zip(texts, counts_list)
+        ], dtype=np.int64).reshape(-1, 7)
+        text_len, prog, math, verif, has_prove, has_algo, has_opt = columns.T
+
+        base_score = np.minimum(text_len / 50.0, 50.0)
+        keyword_score = np.minimum(prog * 2 + math * 3 + verif * 4, 30)
+        special_score = np.minimum(has_prove * 15 + has_algo * 10 + has_opt * 10, 20)
+        return np.minimum(base_score + keyword_score + special_score, 100.0).tolist()
 
     def _determine_task_type(self, prog_count: int, math_count: int,
-                           verif_count: int, contains_code: bool) -> TaskType:
-        """确定任务类型"""
+                           verif_count: int, contains_code: bool,
+                           algo_hit: bool = False) -> TaskType:
+        """确定任务类型（algo_hit 表示文本中出现了"算法"/"algorithm"）"""
         if contains_code or prog_count > math_count + verif_count:
-            if prog_count > 3 or '算法' in str(prog_count):
+            if prog_count > 3 or algo_hit:
                 return TaskType.ALGORITHM_DESIGN
             return TaskType.PROGRAMMING
 
@@ -226,6 +445,31 @@ class TaskAnalyzer:
 class ComplexityEvaluator:
     """复杂度评估模块"""
 
+    # 特殊规则（基于论文发现）的分段决策表：任务类型 → (分段查找函数, 分界点, 各段对应模式)
+    # bisect_left 对应 "complexity <= 分界点"，bisect_right 对应 "complexity < 分界点"
+    _TASK_TYPE_RULES = {
+        # 编程任务：内部推理足够强，避免思维链干扰（<=40 非思考，否则简化）
+        TaskType.PROGRAMMING: (bisect_left, (40,),
+                               (ReasoningMode.NON_THINKING, ReasoningMode.SIMPLIFIED)),
+        # 数学推理：需要逐步验证，保留思维链（>=50 完整思考，否则简化）
+        TaskType.MATH_REASONING: (bisect_right, (50,),
+                                  (ReasoningMode.SIMPLIFIED, ReasoningMode.FULL_THINKING)),
+    }
+
+    # 基于任务类型的置信度加成：(任务类型, 推理模式) → 加成
+    _CONFIDENCE_BONUS = {
+        (TaskType.PROGRAMMING, ReasoningMode.NON_THINKING): 0.2,
+        (TaskType.MATH_REASONING, ReasoningMode.FULL_THINKING): 0.2,
+        (TaskType.SIMPLE_QA, ReasoningMode.NON_THINKING): 0.15,
+    }
+
+    # 各模式不扣减置信度的复杂度区间 [下限, 上限]
+    _CONFIDENCE_RANGE = {
+        ReasoningMode.NON_THINKING: (float('-inf'), 40),
+        ReasoningMode.SIMPLIFIED: (float('-inf'), float('inf')),
+        ReasoningMode.FULL_THINKING: (30, float('inf')),
+    }
+
     def __init__(self):
         # 基于DeepSeek-V3实验数据的权重配置
         self.mode_thresholds = {
@@ -239,22 +483,13 @@ class ComplexityEvaluator:
         """基于任务特征评估推理模式"""
         complexity = features.complexity_score
 
-        # 特殊规则：基于论文发现
-        if features.task_type == TaskType.PROGRAMMING:
-            # 编程任务：内部推理足够强，避免思维链干扰
-            if complexity <= 40:
-                return ReasoningMode.NON_THINKING
-            else:
-                return ReasoningMode.SIMPLIFIED
-
-        if features.task_type == TaskType.MATH_REASONING:
-            # 数学推理：需要逐步验证，保留思维链
-            if complexity >= 50:
-                return ReasoningMode.FULL_THINKING
-            else:
-                return ReasoningMode.SIMPLIFIED
+        # 特殊规则：查表
+        rule = self._TASK_TYPE_RULES.get(features.task_type)
+        if rule is not None:
+            search, bounds, modes = rule
+            return modes[search(bounds, complexity)]
 
-        # 基于复杂度的通用规则
+        # 基于复杂度的通用规则（阈值可在运行时调整，因此每次读取）
         if complexity <= self.mode_thresholds['non_thinking_max']:
             return ReasoningMode.NON_THINKING
         elif complexity <= self.mode_thresholds['simplified_max']:
@@ -266,68 +501,31 @@ class ComplexityEvaluator:
                            selected_mode: ReasoningMode) -> float:
         """计算选择模式的置信度分数"""
         complexity = features.complexity_score
-        base_confidence = 0.7
 
         # 基于任务类型的置信度调整
-        if features.task_type == TaskType.PROGRAMMING and selected_mode == ReasoningMode.NON_THINKING:
-            base_confidence += 0.2
-        elif features.task_type == TaskType.MATH_REASONING and selected_mode == ReasoningMode.FULL_THINKING:
-            base_confidence += 0.2
-        elif features.task_type == TaskType.SIMPLE_QA and selected_mode == ReasoningMode.NON_THINKING:
-            base_confidence += 0.15
+        base_confidence = 0.7 + self._CONFIDENCE_BONUS.get((features.task_type, selected_mode), 0.0)
 
         # 基于复杂度的置信度调整
-        if selected_mode == ReasoningMode.NON_THINKING and complexity > 40:
-            base_confidence -= 0.1
-        elif selected_mode == ReasoningMode.FULL_THINKING and complexity < 30:
+        low, high = self._CONFIDENCE_RANGE[selected_mode]
+        if not low <= complexity <= high:
             base_confidence -= 0.1
 
         return min(max(base_confidence, 0.1), 1.0)
 
 
-class ReasoningExecutor:
-    """推理执行引擎"""
-
-    def __init__(self):
-        self.prompts = {
-            ReasoningMode.NON_THINKING: self._get_non_thinking_prompt,
-            ReasoningMode.SIMPLIFIED: self._get_simplified_prompt,
-            ReasoningMode.FULL_THINKING: self._get_full_thinking_prompt
-        }
-
-    def execute_reasoning(self, task_text: str, mode: ReasoningMode,
-                         features: TaskFeatures) -> str:
-        """执行推理"""
-        prompt_generator = self.prompts[mode]
-        prompt = prompt_generator(task_text, features)
-
-        # 这里应该调用实际的LLM API
-        # 为了演示，我们返回模拟响应
-        return self._simulate_llm_response(prompt, mode, features)
-
-    def _get_non_thinking_prompt(self, task_text: str, features: TaskFeatures) -> str:
-        """非思考模式提示词"""
-        return f"""请直接回答以下问题，不需要展示思考过程：
+# 各推理模式的提示词：固定的指令与输出格式在前（静态前缀，便于LLM服务端前缀缓存命中），
+# 任务文本在后（动态后缀：固定标题 + 任务文本）
+_NON_THINKING_PROMPT = """请直接回答用户给出的问题，不需要展示思考过程。
 
-{task_text}
+请直接给出答案。"""
 
-请直接给出答案："""
-
-    def _get_simplified_prompt(self, task_text: str, features: TaskFeatures) -> str:
-        """简化思考模式提示词"""
-        return f"""请回答以下问题，只需要展示关键步骤：
-
-{task_text}
+_SIMPLIFIED_PROMPT = """请回答用户给出的问题，只需要展示关键步骤。
 
 请按以下格式回答：
 关键步骤：[列出2-3个关键步骤]
 答案：[最终答案]"""
 
-    def _get_full_thinking_prompt(self, task_text: str, features: TaskFeatures) -> str:
-        """完整思考模式提示词"""
-        return f"""请详细回答以下问题，展示完整的思考过程：
-
-{task_text}
+_FULL_THINKING_PROMPT = """请详细回答用户给出的问题，展示完整的思考过程。
 
 请按以下格式回答：
 1. 问题分析：[分析问题的要求和约束]
@@ -336,60 +534,132 @@ class ReasoningExecutor:
 4. 验证检查：[检查答案的正确性]
 5. 最终答案：[给出最终答案]"""
 
+_TASK_PROMPT_HEAD = """问题：
+
+"""
+
+
+# 模拟LLM响应模板
+_SIMULATED_RESPONSES = {
+    ReasoningMode.NON_THINKING: "基于内部推理，针对{task_type}任务（复杂度:{complexity:.1f}），直接给出答案：[模拟答案]",
+    ReasoningMode.SIMPLIFIED: "针对{task_type}任务（复杂度:{complexity:.1f}）的简化推理：\n关键步骤：1) 分析 2) 计算 3) 验证\n答案：[模拟答案]",
+    ReasoningMode.FULL_THINKING: "针对{task_type}任务（复杂度:{complexity:.1f}）的完整推理：\n1. 问题分析：...\n2. 解决思路：...\n3. 详细步骤：...\n4. 验证检查：...\n5. 最终答案：[模拟答案]"
+}
+
+
+class ReasoningExecutor:
+    """推理执行引擎"""
+
+    _PROMPT_TEMPLATES = {
+        ReasoningMode.NON_THINKING: _NON_THINKING_PROMPT,
+        ReasoningMode.SIMPLIFIED: _SIMPLIFIED_PROMPT,
+        ReasoningMode.FULL_THINKING: _FULL_THINKING_PROMPT
+    }
+
+    # 完整提示词中任务文本之前的部分（静态前缀 + 问题标题），按模式预先拼好
+    _PROMPT_HEADS = {mode: prefix + "\n\n" + _TASK_PROMPT_HEAD
+                     for mode, prefix in _PROMPT_TEMPLATES.items()}
+
+    def build_prompt_parts(self, task_text: str, mode: ReasoningMode) -> Tuple[str, str]:
+        """生成 (静态前缀, 动态后缀) 两部分提示词，前缀只取决于推理模式"""
+        return self._PROMPT_TEMPLATES[mode], _TASK_PROMPT_HEAD + task_text
+
+    def build_prompt(self, task_text: str, mode: ReasoningMode) -> str:
+        """根据推理模式生成完整提示词（一次查表 + 一次拼接）"""
+        return self._PROMPT_HEADS[mode] + task_text
+
+    def execute_reasoning(self, task_text: str, mode: ReasoningMode,
+                         features: TaskFeatures) -> str:
+        """执行推理"""
+        prompt = self.build_prompt(task_text, mode)
+
+        # 这里应该调用实际的LLM API
+        # 为了演示，我们返回模拟响应
+        return self._simulate_llm_response(prompt, mode, features)
+
     def _simulate_llm_response(self, prompt: str, mode: ReasoningMode,
                               features: TaskFeatures) -> str:
         """模拟LLM响应（实际应用中应调用真实的LLM API）"""
-        task_type = features.task_type.value
-        complexity = features.complexity_score
-
-        responses = {
-            ReasoningMode.NON_THINKING: f"基于内部推理，针对{task_type}任务（复杂度:{complexity:.1f}），直接给出答案：[模拟答案]",
-            ReasoningMode.SIMPLIFIED: f"针对{task_type}任务（复杂度:{complexity:.1f}）的简化推理：\n关键步骤：1) 分析 2) 计算 3) 验证\n答案：[模拟答案]",
-            ReasoningMode.FULL_THINKING: f"针对{task_type}任务（复杂度:{complexity:.1f}）的完整推理：\n1. 问题分析：...\n2. 解决思路：...\n3. 详细步骤：...\n4. 验证检查：...\n5. 最终答案：[模拟答案]"
-        }
-
-        return responses[mode]
+        # 只格式化所选模式的响应模板
+        return _SIMULATED_RESPONSES[mode].format(
+            task_type=features.task_type.value,
+            complexity=features.complexity_score
+        )
 
 
 class AdaptiveReasoningSystem:
     """自适应推理系统主类"""
 
-    def __init__(self):
+    def __init__(self, max_workers: int = 1):
         self.task_analyzer = TaskAnalyzer()
         self.complexity_evaluator = ComplexityEvaluator()
         self.reasoning_executor = ReasoningExecutor()
-        self.stats = {
-            'total_tasks': 0,
-            'mode_usage': {mode.value: 0 for mode in ReasoningMode},
-            'avg_execution_time': 0.0,
-            'task_types': {task_type.value: 0 for task_type in TaskType}
+        # batch_process 的并发线程数：本地模拟执行是CPU密集型，默认串行；
+        # 调用真实LLM（I/O密集型）的子类再开启线程池
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None  # 首次批量处理时创建，之后复用
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._id_counter = itertools.count()  # 默认任务ID序号（并发下也不会重复）
+
+        # 统计计数：按枚举下标索引的定长列表，平均耗时由总和/总数在查询时计算
+        self._total_tasks = 0
+        self._total_ns = 0  # 累计执行时间（整数纳秒，查询时再换算为秒）
+        self._mode_counts = [0] * len(ReasoningMode)
+        self._task_type_counts = [0] * len(TaskType)
+        self._stats_cache: Optional[Dict[str, Any]] = None  # get_statistics 的缓存，统计更新时失效
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """统计信息快照（原始计数，字典格式）"""
+        return {
+            'total_tasks': self._total_tasks,
+            'mode_usage': {mode.value: count
+                           for mode, count in zip(ReasoningMode, self._mode_counts)},
+            'avg_execution_time': self._total_ns / self._total_tasks / 1e9 if self._total_tasks else 0.0,
+            'task_types': {task_type.value: count
+                           for task_type, count in zip(TaskType, self._task_type_counts)}
         }
 
-    def process_task(self, task_text: str, task_id: Optional[str] = None) -> ReasoningResult:
-        """处理单个任务"""
-        start_time = time.time()
+    def process_task(self, task_text: str, task_id: Optional[str] = None,
+                     verbose: bool = True,
+                     features: Optional[TaskFeatures] = None,
+                     stats_records: Optional[list] = None) -> ReasoningResult:
+        """处理单个任务（verbose=False 时不输出逐任务日志；可传入预先分析好的特征；
+        传入 stats_records 时统计记录追加到该列表，由调用方批量汇总）"""
+        start_ns = time.perf_counter_ns()
+        verbose = verbose and logger.isEnabledFor(logging.INFO)
 
         if task_id is None:
-            task_id = f"task_{int(time.time() * 1000)}"
+            task_id = f"task_{next(self._id_counter)}"
 
-        logger.info(f"开始处理任务 {task_id}")
+        if verbose:
+            logger.info("开始处理任务 %s", task_id)
 
         # 1. 分析任务特征
-        features = self.task_analyzer.analyze_task(task_text)
-        logger.info(f"任务特征分析完成: {features.task_type.value}, 复杂度: {features.complexity_score:.1f}")
+        if features is None:
+            features = self.task_analyzer.analyze_task(task_text)
+        if verbose:
+            logger.info("任务特征分析完成: %s, 复杂度: %.1f",
+                        features.task_type.value, features.complexity_score)
 
         # 2. 选择推理模式
         reasoning_mode = self.complexity_evaluator.evaluate_reasoning_mode(features)
         confidence_score = self.complexity_evaluator.get_confidence_score(features, reasoning_mode)
-        logger.info(f"选择推理模式: {reasoning_mode.value}, 置信度: {confidence_score:.3f}")
+        if verbose:
+            logger.info("选择推理模式: %s, 置信度: %.3f", reasoning_mode.value, confidence_score)
 
         # 3. 执行推理
         response = self.reasoning_executor.execute_reasoning(task_text, reasoning_mode, features)
 
-        execution_time = time.time() - start_time
+        execution_time_ns = time.perf_counter_ns() - start_ns
+        execution_time = execution_time_ns / 1e9
 
-        # 4. 更新统计信息
-        self._update_stats(features.task_type, reasoning_mode, execution_time)
+        # 4. 更新统计信息（批量处理时先记录，整批结束后一次性汇总）
+        if stats_records is not None:
+            stats_records.append((features.task_type, reasoning_mode, execution_time_ns))
+        else:
+            self._update_stats(features.task_type, reasoning_mode, execution_time_ns)
 
         # 5. 构造结果
         result = ReasoningResult(
@@ -405,66 +675,153 @@ class AdaptiveReasoningSystem:
             }
         )
 
-        logger.info(f"任务 {task_id} 处理完成，耗时: {execution_time:.3f}秒")
+        if verbose:
+            logger.info("任务 %s 处理完成，耗时: %.3f秒", task_id, execution_time)
 
         return result
 
-    def batch_process(self, tasks: List[Dict[str, str]]) -> List[ReasoningResult]:
-        """批量处理任务"""
-        results = []
-
-        logger.info(f"开始批量处理 {len(tasks)} 个任务")
-
-        for i, task_info in enumerate(tasks):
-            task_text = task_info.get('text', task_info.get('task', ''))
-            task_id = task_info.get('id', f"batch_task_{i}")
-
-            try:
-                result = self.process_task(task_text, task_id)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"处理任务 {task_id} 时发生错误: {e}")
-                # 创建错误结果
-                error_result = ReasoningResult(
-                    task_id=task_id,
-                    reasoning_mode=ReasoningMode.NON_THINKING,
-                    response=f"错误: {str(e)}",
-                    execution_time=0.0,
-                    confidence_score=0.0,
-                    metadata={'error': str(e)}
-                )
-                results.append(error_result)
-
-        logger.info(f"批量处理完成，成功处理 {len([r for r in results if 'error' not in r.metadata])} 个任务")
+    def batch_process(self, tasks: Iterable[Dict[str, str]],
+                      log_each: bool = False) -> List[ReasoningResult]:
+        """批量处理任务（tasks 可以是任意可迭代对象，如生成器；默认只输出批次级日志，log_each=True 时输出逐任务日志）"""
+        batch_start = time.perf_counter()
+
+        # 整批特征分析需要全部文本，生成器等输入在这里只物化一次
+        if not isinstance(tasks, (list, tuple)):
+            tasks = list(tasks)
+
+        logger.info("开始批量处理 %d 个任务", len(tasks))
+
+        # 整批预先分析任务特征；若个别任务输入异常则回退到逐任务分析以隔离错误
+        try:
+            features_list = self.task_analyzer.analyze_tasks(
+                [task_info.get('text', task_info.get('task', '')) for task_info in tasks]
+            )
+        except Exception:
+            features_list = [None] * len(tasks)
+
+        stats_records = []
+
+        def run(indexed_task):
+            index, task_info = indexed_task
+            return self._process_batch_item(index, task_info, log_each=log_each,
+                                            features=features_list[index],
+                                            stats_records=stats_records)
+
+        if self.max_workers > 1 and len(tasks) > 1:
+            # 线程池并发执行，结果按提交顺序返回
+            results = list(self._get_executor().map(run, enumerate(tasks)))
+        else:
+            results = [run(indexed_task) for indexed_task in enumerate(tasks)]
+
+        self._update_stats_batch(stats_records)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("批量处理完成，成功处理 %d 个任务，耗时: %.3f秒",
+                        sum(1 for r in results if 'error' not in r.metadata),
+                        time.perf_counter() - batch_start)
 
         return results
 
-    def _update_stats(self, task_type: TaskType, reasoning_mode: ReasoningMode,
-                     execution_time: float):
-        """更新统计信息"""
-        self.stats['total_tasks'] += 1
-        self.stats['mode_usage'][reasoning_mode.value] += 1
-        self.stats['task_types'][task_type.value] += 1
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """返回批量处理共用的线程池（惰性创建，避免每个批次重复创建和销毁线程）"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="batch_process")
+        return self._executor
+
+    def close(self):
+        """关闭批量处理线程池（之后再调用 batch_process 会重新创建）"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _process_batch_item(self, index: int, task_info: Dict[str, str],
+                            log_each: bool = False,
+                            features: Optional[TaskFeatures] = None,
+                            stats_records: Optional[list] = None) -> ReasoningResult:
+        """处理批量中的单个任务，出错时返回错误结果"""
+        task_text = task_info.get('text', task_info.get('task', ''))
+        task_id = task_info.get('id', f"batch_task_{index}")
+
+        try:
+            return self.process_task(task_text, task_id, verbose=log_each, features=features,
+                                     stats_records=stats_records)
+        except Exception as e:
+            logger.error("处理任务 %s 时发生错误: %s", task_id, e)
+            # 创建错误结果
+            return ReasoningResult(
+                task_id=task_id,
+                reasoning_mode=ReasoningMode.NON_THINKING,
+                response=f"错误: {str(e)}",
+                execution_time=0.0,
+                confidence_score=0.0,
+                metadata={'error': str(e)}
+            )
 
-        # 更新平均执行时间
-        total_time = self.stats['avg_execution_time'] * (self.stats['total_tasks'] - 1)
-        self.stats['avg_execution_time'] = (total_time + execution_time) / self.stats['total_tasks']
+    def _update_stats(self, task_type: TaskType, reasoning_mode: ReasoningMode,
+                     execution_time_ns: int):
+        """更新统计信息（线程安全，execution_time_ns 为整数纳秒）"""
+        with self._stats_lock:
+            self._total_tasks += 1
+            self._total_ns += execution_time_ns
+            self._mode_counts[_MODE_INDEX[reasoning_mode]] += 1
+            self._task_type_counts[_TASK_TYPE_INDEX[task_type]] += 1
+            self._stats_cache = None
+
+    def _update_stats_batch(self, records: List[Tuple[TaskType, ReasoningMode, int]]):
+        """一次性汇总一批 (任务类型, 推理模式, 纳秒耗时) 记录（只加一次锁）"""
+        if not records:
+            return
+
+        task_types, modes, times_ns = zip(*records)
+        with self._stats_lock:
+            self._total_tasks += len(records)
+            self._total_ns += sum(times_ns)
+            for mode, count in Counter(modes).items():
+                self._mode_counts[_MODE_INDEX[mode]] += count
+            for task_type, count in Counter(task_types).items():
+                self._task_type_counts[_TASK_TYPE_INDEX[task_type]] += count
+            self._stats_cache = None
+
+    def reset_statistics(self):
+        """清零统计计数（特征分析缓存、线程池等保持不变）"""
+        with self._stats_lock:
+            self._total_tasks = 0
+            self._total_ns = 0
+            self._mode_counts = [0] * len(ReasoningMode)
+            self._task_type_counts = [0] * len(TaskType)
+            self._stats_cache = None
 
     def get_statistics(self) -> Dict[str, Any]:
-        """获取系统统计信息"""
-        if self.stats['total_tasks'] == 0:
+        """获取系统统计信息（报告缓存到下一次统计更新为止，每次返回独立副本）"""
+        with self._stats_lock:
+            if self._stats_cache is None:
+                self._stats_cache = self._build_statistics()
+            report = self._stats_cache
+
+        # 报告只有两层且叶子都是不可变值，逐层复制即可与缓存隔离
+        return {key: dict(value) if isinstance(value, dict) else value
+                for key, value in report.items()}
+
+    def _build_statistics(self) -> Dict[str, Any]:
+        """根据计数生成统计报告"""
+        total_tasks = self._total_tasks
+        if total_tasks == 0:
             return {"message": "暂无统计数据"}
 
         return {
-            "总任务数": self.stats['total_tasks'],
-            "平均执行时间": f"{self.stats['avg_execution_time']:.3f}秒",
+            "总任务数": total_tasks,
+            "平均执行时间": f"{self._total_ns / total_tasks / 1e9:.3f}秒",
             "推理模式使用情况": {
-                mode: f"{count} ({count/self.stats['total_tasks']*100:.1f}%)"
-                for mode, count in self.stats['mode_usage'].items()
+                mode.value: f"{count} ({count/total_tasks*100:.1f}%)"
+                for mode, count in zip(ReasoningMode, self._mode_counts)
             },
             "任务类型分布": {
-                task_type: f"{count} ({count/self.stats['total_tasks']*100:.1f}%)"
-                for task_type, count in self.stats['task_types'].items()
+                task_type.value: f"{count} ({count/total_tasks*100:.1f}%)"
+                for task_type, count in zip(TaskType, self._task_type_counts)
                 if count > 0
             }
         }
@@ -79,8 +79,7 @@ def demo_mode_comparison():
         print(f"📝 {mode_name}:")
 
         # 获取提示词
-        features = system.task_analyzer.analyze_task(task)
-        prompt = system.reasoning_executor.prompts[mode](task, features)
+        prompt = system.reasoning_executor.build_prompt(task, mode)
 
         # 显示提示词的关键部分
         if mode == ReasoningMode.NON_THINKING:
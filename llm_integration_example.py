@@ -5,23 +5,459 @@ LLM集成示例
 """
 
 import os
+import re
+import atexit
 import json
+import hashlib
+import logging
+import time
 import asyncio
-from typing import Optional, Dict, Any
+import functools
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Tuple
 from adaptive_reasoning_system import (
-    AdaptiveReasoningSystem, ReasoningMode, ReasoningExecutor, TaskFeatures
+    AdaptiveReasoningSystem, ReasoningMode, ReasoningExecutor, ReasoningResult, TaskFeatures
 )
 
+try:
+    import numpy as np  # 语义缓存的向量存储与相似度计算
+except ImportError:
+    np = None
+
+try:
+    import orjson  # 更快的JSON序列化（直接输出UTF-8字节）
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+logger = logging.getLogger(__name__)
+
+# 默认API密钥（模块导入时读取一次环境变量）
+_DEFAULT_API_KEY = os.getenv("LLM_API_KEY")
+
+try:
+    import aiohttp  # 原生异步HTTP客户端：高并发调用不占用线程池
+except ImportError:
+    aiohttp = None
+
+# 提示词规范化用的正则（模块加载时预编译）
+_TRAILING_SPACE_RE = re.compile(r'[ \t\u3000]+$', re.MULTILINE)
+_INLINE_SPACE_RE = re.compile(r'(?<=\S)[ \t\u3000]{2,}')  # 行首缩进保留（任务中可能含代码）
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def _canonicalize(prompt: str) -> str:
+    """规范化提示词，保证语义相同的提示词字节级一致（前缀缓存与语义缓存的键才稳定）
+
+    NFC归一化Unicode、去掉行尾空白、合并行内连续空白与多余空行；换行和行首缩进保留，不破坏提示词结构
+    """
+    prompt = prompt.replace('\r\n', '\n')
+    if not unicodedata.is_normalized('NFC', prompt):  # 快速检查，已是NFC（绝大多数情况）时跳过归一化
+        prompt = unicodedata.normalize('NFC', prompt)
+    prompt = _TRAILING_SPACE_RE.sub('', prompt)
+    prompt = _INLINE_SPACE_RE.sub(' ', prompt)
+    return _BLANK_LINES_RE.sub('\n\n', prompt).strip()
+
+
+# 静态前缀只有少数几种取值，规范化结果直接缓存
+_canonicalize_static = functools.lru_cache(maxsize=64)(_canonicalize)
+
+
+class SemanticResponseCache:
+    """语义响应缓存：提示词向量余弦相似度足够高时直接复用已有响应，跳过API调用"""
+
+    # 各推理模式的命中阈值（完整思考模式要求更严格）
+    DEFAULT_THRESHOLDS = {
+        ReasoningMode.NON_THINKING: 0.92,
+        ReasoningMode.SIMPLIFIED: 0.94,
+        ReasoningMode.FULL_THINKING: 0.97,
+    }
+
+    def __init__(self, embed_fn: Callable[[str], Any],
+                 max_entries: int = 1024,
+                 thresholds: Optional[Dict[ReasoningMode, float]] = None):
+        """
+        Args:
+            embed_fn: 文本 → 向量的函数，须来自真实的语义嵌入模型（如 SentenceTransformer(...).encode）；
+                      字符n-gram之类的字面向量会把"最长/最短"、"x+y/x-y"这类仅差一两个字的问题判为相同
+            max_entries: 最大缓存条目数，超出后按LRU淘汰
+            thresholds: 各推理模式的相似度阈值
+        """
+        if np is None:
+            raise ImportError("SemanticResponseCache 需要安装 numpy")
+
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.thresholds = {**self.DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self._mode_codes = {mode: code for code, mode in enumerate(ReasoningMode)}
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        """清空缓存"""
+        self._entries: "OrderedDict[int, Tuple[str, ReasoningMode, str, float]]" = OrderedDict()
+        self._rows: Dict[Tuple[str, ReasoningMode], int] = {}  # (提示词, 模式) → 行号
+        self._matrix = None  # (max_entries, 向量维度) 的float32矩阵，首次写入时分配
+        self._row_modes = np.full(self.max_entries, -1, dtype=np.int8)
+        self._free_rows = list(range(self.max_entries - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def embed(self, text: str):
+        """计算L2归一化后的float32向量"""
+        vector = np.asarray(self.embed_fn(text), dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, prompt: str, mode: ReasoningMode):
+        """查找语义相近的缓存响应，返回 (响应或None, 查询向量)"""
+        query = self.embed(prompt)
+        with self._lock:
+            if not self._entries:
+                return None, query
+
+            scores = self._matrix @ query
+            scores[self._row_modes != self._mode_codes[mode]] = -1.0
+            row = int(np.argmax(scores))
+            if scores[row] < self.thresholds[mode]:
+                return None, query
+
+            self._entries.move_to_end(row)
+            return self._entries[row][2], query
+
+    def put(self, prompt: str, mode: ReasoningMode, response: str,
+            embedding=None, timestamp: Optional[float] = None):
+        """写入缓存（相同提示词与模式只占一行，重复写入时更新响应；已满时淘汰最久未使用的条目）"""
+        timestamp = time.time() if timestamp is None else timestamp
+        key = (prompt, mode)
+        if embedding is None:
+            embedding = self.embed(prompt)
+
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                self._entries[row] = (prompt, mode, response, timestamp)
+                self._entries.move_to_end(row)
+                return
+
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row, (old_prompt, old_mode, _, _) = self._entries.popitem(last=False)
+                del self._rows[(old_prompt, old_mode)]
+
+            self._rows[key] = row
+            self._matrix[row] = embedding
+            self._row_modes[row] = self._mode_codes[mode]
+            self._entries[row] = (prompt, mode, response, timestamp)
+
+    def save(self, filename: str):
+        """将缓存（按LRU顺序）保存为 .npz 文件"""
+        with self._lock:
+            rows = list(self._entries)
+            entries = list(self._entries.values())
+            embeddings = (self._matrix[rows] if rows
+                          else np.zeros((0, 0), dtype=np.float32))
+
+        np.savez(
+            filename,
+            embeddings=embeddings,
+            prompts=np.array([entry[0] for entry in entries], dtype=str),
+            modes=np.array([entry[1].value for entry in entries], dtype=str),
+            responses=np.array([entry[2] for entry in entries], dtype=str),
+            timestamps=np.array([entry[3] for entry in entries], dtype=np.float64),
+        )
+
+    def load(self, filename: str):
+        """从 .npz 文件恢复缓存"""
+        with np.load(filename) as data:
+            records = list(zip(data['embeddings'], data['prompts'].tolist(),
+                               data['modes'].tolist(), data['responses'].tolist(),
+                               data['timestamps'].tolist()))
+
+        with self._lock:
+            self._clear()
+        for embedding, prompt, mode, response, timestamp in records[-self.max_entries:]:
+            self.put(prompt, ReasoningMode(mode), response,
+                     embedding=embedding, timestamp=timestamp)
+
+    def merge(self, other: "SemanticResponseCache"):
+        """把另一个缓存的条目（按其LRU顺序）并入本缓存，不清空已有条目"""
+        with other._lock:
+            records = [(other._matrix[row].copy(), entry) for row, entry in other._entries.items()]
+        for embedding, (prompt, mode, response, timestamp) in records:
+            self.put(prompt, mode, response, embedding=embedding, timestamp=timestamp)
+
+
+def _dumps_sorted(data: Any):
+    """按键排序序列化（用作请求去重键，orjson不可用时回退到标准库）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, ensure_ascii=False)
+
+
+class ExactResponseCache:
+    """精确匹配响应缓存：规范化后完全相同的提示词直接返回已有响应（连向量都不用计算）"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Optional[str], str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, system_prompt: Optional[str], prompt: str) -> Optional[str]:
+        """查找缓存响应（命中时标记为最近使用）"""
+        key = (system_prompt, prompt)
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def put(self, system_prompt: Optional[str], prompt: str, response: str):
+        """写入缓存（已满时淘汰最久未使用的条目）"""
+        with self._lock:
+            self._entries[(system_prompt, prompt)] = response
+            self._entries.move_to_end((system_prompt, prompt))
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self, filename: str):
+        """将缓存（按LRU顺序）保存为JSON文件"""
+        with self._lock:
+            records = [[system_prompt, prompt, response]
+                       for (system_prompt, prompt), response in self._entries.items()]
+
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(records))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False)
+
+    def load(self, filename: str):
+        """从JSON文件恢复缓存"""
+        with open(filename, 'rb') as f:
+            records = _json_loads(f.read())
+
+        with self._lock:
+            self._entries.clear()
+        for system_prompt, prompt, response in records[-self.max_entries:]:
+            self.put(system_prompt, prompt, response)
+
+    def merge(self, other: "ExactResponseCache"):
+        """把另一个缓存的条目（按其LRU顺序）并入本缓存，不清空已有条目"""
+        with other._lock:
+            records = list(other._entries.items())
+        for (system_prompt, prompt), response in records:
+            self.put(system_prompt, prompt, response)
+
+
+class AsyncRequestBatcher:
+    """异步微批器：在很短的时间窗口内收集并发请求，相同请求合并为一次API调用
+
+    - 可复用响应的请求（确定性较强的模式）：同一窗口内的重复请求共享同一个响应
+    - 需要独立采样的请求（完整思考模式）：服务商支持 n 参数时，重复请求合并为一次调用一次生成多个候选；
+      否则逐个发送
+    不同请求之间互不合并，仍并发发送（对话补全接口不支持在一次调用中携带多个不同提示词）
+    """
+
+    def __init__(self, dispatch: Callable[[Dict[str, Any], int, Optional[float]], Any],
+                 max_batch_size: int = 16, max_wait_ms: float = 10, supports_n: bool = True):
+        """
+        Args:
+            dispatch: 协程函数 (请求体, 候选数n, 超时秒数) → 响应文本列表
+            max_batch_size: 单个窗口最多收集的请求数
+            max_wait_ms: 收集窗口时长（毫秒）
+            supports_n: 服务商是否支持用 n 参数一次生成多个候选（部分兼容接口会忽略或拒绝该参数）
+        """
+        self._dispatch = dispatch
+        self.max_batch_size = max_batch_size
+        self.supports_n = supports_n
+        self.max_wait = max_wait_ms / 1000
+        self._queue = asyncio.Queue()
+        self._pending = set()  # 持有发送中的任务引用，防止被垃圾回收
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, payload: Dict[str, Any], shared: bool = True,
+                     timeout: Optional[float] = None) -> str:
+        """提交请求并等待响应（shared=False 表示重复请求需要各自独立的候选；
+        timeout 作用于实际发出的HTTP请求，超时后请求本身被取消并释放并发名额）"""
+        future = asyncio.get_running_loop().create_future()
+        key = (shared, _dumps_sorted(payload))
+        self._queue.put_nowait((key, payload, future, timeout))
+        return await future
+
+    async def _run(self):
+        """后台循环：按时间窗口/批大小取出一批请求，分组后并发发送"""
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # 请求体相同（含模型与采样参数）即同一推理模式，超时取组内第一个请求的设置
+            groups: Dict[Tuple[bool, str], Tuple[Dict[str, Any], Optional[float], list]] = {}
+            for key, payload, future, timeout in batch:
+                groups.setdefault(key, (payload, timeout, []))[2].append(future)
+
+            for (shared, _), (payload, timeout, futures) in groups.items():
+                if shared or self.supports_n:
+                    chunks = (futures,)
+                else:
+                    # 不支持 n 参数时，需要独立候选的重复请求逐个发送
+                    chunks = [[future] for future in futures]
+                for chunk in chunks:
+                    task = asyncio.ensure_future(self._flush(payload, chunk, shared, timeout))
+                    self._pending.add(task)
+                    task.add_done_callback(self._pending.discard)
+
+    async def _flush(self, payload: Dict[str, Any], futures: list, shared: bool,
+                     timeout: Optional[float] = None):
+        """发送一组相同请求，并把结果分发给各个等待者"""
+        try:
+            contents = await self._dispatch(payload, 1 if shared else len(futures), timeout)
+            if not shared and len(contents) < len(futures):
+                # 服务商忽略了 n 参数（只返回部分候选）：缺少的候选逐个补发，而不是让多出来的等待者失败
+                # 补发失败不影响已拿到的候选
+                extra = await asyncio.gather(*(
+                    self._dispatch(payload, 1, timeout) for _ in range(len(futures) - len(contents))
+                ), return_exceptions=True)
+                contents = contents + [result[0] for result in extra
+                                       if not isinstance(result, BaseException) and result]
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # 共享请求的所有等待者复用第一个候选；补发后仍不足时，没分到结果的等待者收到异常而不是一直挂起
+        requested, received = (1 if shared else len(futures)), len(contents)
+        if shared:
+            contents = contents[:1] * len(futures)
+        for i, future in enumerate(futures):
+            if future.done():
+                continue
+            if i < len(contents):
+                future.set_result(contents[i])
+            else:
+                future.set_exception(RuntimeError(
+                    f"API返回的候选数不足（需要 {requested} 个，实际 {received} 个）"))
+
+    async def aclose(self):
+        """停止后台循环"""
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+
+class _LoopResources(threading.local):
+    """按线程保存的事件循环绑定资源（类属性即每个线程的初始值）"""
+    loop = None
+    http = None
+    semaphore = None
+    batcher = None
+
 
 class LLMAPIClient:
     """LLM API客户端接口（可适配多种API）"""
 
-    def __init__(self, api_type: str = "openai", api_key: str = None, base_url: str = None):
+    # OpenAI 前缀缓存生效所需的最小提示词长度（token）
+    PROMPT_CACHE_MIN_TOKENS = 1024
+
+    # 各API类型的默认地址（OpenAI兼容的 /chat/completions 接口）
+    DEFAULT_BASE_URLS = {
+        "openai": "https://api.openai.com/v1",
+        "deepseek": "https://api.deepseek.com/v1",
+    }
+
+    # 异步HTTP连接池大小
+    MAX_CONNECTIONS = 1000
+
+    # 各推理模式的单次请求超时（秒），超时后降级为模拟响应，避免拖慢整批任务
+    MODE_TIMEOUTS = {
+        ReasoningMode.NON_THINKING: 10,
+        ReasoningMode.SIMPLIFIED: 30,
+        ReasoningMode.FULL_THINKING: 90,
+    }
+
+    # 各推理模式的采样参数：(temperature, max_tokens)
+    MODE_SAMPLING = {
+        ReasoningMode.NON_THINKING: (0.3, 1024),   # 更确定性的输出、较短的回答
+        ReasoningMode.SIMPLIFIED: (0.5, 1536),
+        ReasoningMode.FULL_THINKING: (0.7, 2048),  # 允许更长的详细回答
+    }
+
+    # 各API类型按推理模式选用的模型（未列出的模式使用 "default" 项）
+    MODE_MODELS = {
+        "openai": {
+            ReasoningMode.FULL_THINKING: "gpt-4-turbo-preview",  # 更强的推理能力
+            "default": "gpt-3.5-turbo",                          # 更快速的响应
+        },
+        "deepseek": {"default": "deepseek-chat"},
+    }
+
+    # 精确匹配缓存容量（只缓存非思考模式的响应）
+    EXACT_CACHE_SIZE = 4096
+
+    # 微批窗口：最多等待的毫秒数与单批最大请求数
+    BATCH_MAX_WAIT_MS = 10
+    BATCH_MAX_SIZE = 16
+
+    # 支持 n 参数（一次调用生成多个候选）的API类型；其他服务商（如DeepSeek）会忽略或拒绝该参数
+    N_SUPPORTED_API_TYPES = frozenset({"openai"})
+
+    def __init__(self, api_type: str = "openai", api_key: str = None, base_url: str = None,
+                 embed_fn: Optional[Callable[[str], Any]] = None, max_concurrency: int = 100):
+        """
+        Args:
+            embed_fn: 语义嵌入模型的编码函数（文本 → 向量）；提供时才启用语义响应缓存
+        """
         self.api_type = api_type
-        self.api_key = api_key or os.getenv("LLM_API_KEY")
+        self.api_key = api_key or _DEFAULT_API_KEY
         self.base_url = base_url
         self.client = self._initialize_client()
 
+        # 配置在构造后固定：预先生成 模式 → (temperature, max_tokens, model) 查找表
+        models = self.MODE_MODELS.get(api_type, {"default": "default-model"})
+        self._mode_params = {
+            mode: (*self.MODE_SAMPLING[mode], models.get(mode, models["default"]))
+            for mode in ReasoningMode
+        }
+
+        # 异步HTTP会话、并发闸门与微批器绑定事件循环，首次请求时按当前循环创建；
+        # 按线程分别保存，多个线程各自运行事件循环（如同步批量处理）时互不干扰
+        self.max_concurrency = max_concurrency
+        self._local = _LoopResources()
+
+        # 同步调用共用的后台事件循环（首次同步调用时启动），HTTP会话与连接在多次调用间复用
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_thread: Optional[threading.Thread] = None
+        self._sync_loop_lock = threading.Lock()
+
+        # 精确匹配缓存（非思考模式输出最稳定，重复提问直接复用）
+        self.exact_cache = ExactResponseCache(self.EXACT_CACHE_SIZE)
+
+        # 语义响应缓存（仅在提供了嵌入模型且真实API调用时启用；需要numpy）
+        self.semantic_cache = None
+        if embed_fn is not None and self.client is not None:
+            if np is None:
+                logger.warning("未安装numpy，语义响应缓存已禁用")
+            else:
+                self.semantic_cache = SemanticResponseCache(embed_fn)
+
     def _initialize_client(self):
         """初始化API客户端"""
         if self.api_type == "openai":
@@ -29,7 +465,7 @@ class LLMAPIClient:
                 import openai
                 return openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
             except ImportError:
-                print("警告: 未安装openai库，使用模拟响应")
+                logger.warning("未安装openai库，使用模拟响应")
                 return None
         elif self.api_type == "deepseek":
             # DeepSeek API客户端
@@ -37,61 +473,272 @@ class LLMAPIClient:
                 import openai  # DeepSeek兼容OpenAI API
                 return openai.OpenAI(
                     api_key=self.api_key,
-                    base_url="https://api.deepseek.com/v1"
+                    base_url=self.DEFAULT_BASE_URLS["deepseek"]
                 )
             except ImportError:
-                print("警告: 未安装openai库，使用模拟响应")
+                logger.warning("未安装openai库，使用模拟响应")
                 return None
         else:
-            print(f"警告: 不支持的API类型 {self.api_type}，使用模拟响应")
+            logger.warning("不支持的API类型 %s，使用模拟响应", self.api_type)
             return None
 
+    def _chat_completions_url(self) -> str:
+        """OpenAI兼容的对话补全接口地址（取SDK客户端解析后的地址，含 OPENAI_BASE_URL 等环境变量配置）"""
+        return str(self.client.base_url).rstrip('/') + "/chat/completions"
+
+    def _get_batcher(self) -> AsyncRequestBatcher:
+        """获取当前事件循环上的微批器（必要时连同HTTP会话一起创建）"""
+        loop = asyncio.get_running_loop()
+        if self._local.loop is not loop:
+            if aiohttp is not None:
+                self._local.http = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.MAX_CONNECTIONS,
+                                                   limit_per_host=self.MAX_CONNECTIONS),
+                    timeout=aiohttp.ClientTimeout(total=max(self.MODE_TIMEOUTS.values())),
+                    # 密钥取SDK客户端解析后的值（未显式传入时来自 OPENAI_API_KEY 等环境变量）
+                    headers={"Authorization": f"Bearer {self.client.api_key}"},
+                )
+            self._local.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._local.batcher = AsyncRequestBatcher(self._dispatch,
+                                                max_batch_size=self.BATCH_MAX_SIZE,
+                                                max_wait_ms=self.BATCH_MAX_WAIT_MS,
+                                                supports_n=self.api_type in self.N_SUPPORTED_API_TYPES)
+            self._local.loop = loop
+        return self._local.batcher
+
+    async def aclose(self):
+        """关闭微批器与异步HTTP会话（在创建它们的事件循环中调用）"""
+        if self._local.batcher is not None:
+            await self._local.batcher.aclose()
+        if self._local.http is not None and not self._local.http.closed:
+            await self._local.http.close()
+        self._local.http = None
+        self._local.semaphore = None
+        self._local.batcher = None
+        self._local.loop = None
+
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """获取同步调用共用的后台事件循环（在守护线程中常驻运行，首次调用时启动）"""
+        if self._sync_loop is None:
+            with self._sync_loop_lock:
+                if self._sync_loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._sync_thread = threading.Thread(target=loop.run_forever,
+                                                         name="llm_client_loop", daemon=True)
+                    self._sync_thread.start()
+                    atexit.register(self.close)
+                    self._sync_loop = loop
+        return self._sync_loop
+
+    def run_sync(self, coro):
+        """在后台事件循环上执行协程并阻塞等待结果（可从任意线程调用，不能在该循环内部调用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_sync_loop()).result()
+
+    def close(self):
+        """关闭后台事件循环及其上的HTTP会话（未启动时无操作）"""
+        with self._sync_loop_lock:
+            loop, thread = self._sync_loop, self._sync_thread
+            self._sync_loop = self._sync_thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    async def _dispatch(self, payload: Dict[str, Any], n: int = 1,
+                        timeout: Optional[float] = None) -> list:
+        """发送一次对话补全请求，返回 n 个候选的文本（经信号量限制同时在途的请求数；
+        timeout 为请求总时长上限，未指定时使用会话默认值）"""
+        async with self._local.semaphore:
+            if self._local.http is not None:
+                if n > 1:
+                    payload = {**payload, "n": n}
+                request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout is not None else None
+                async with self._local.http.post(self._chat_completions_url(), json=payload,
+                                                 timeout=request_timeout) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                return [choice["message"]["content"] for choice in data["choices"]]
+
+            # 未安装aiohttp时回退到同步SDK（在线程池中执行）
+            request_kwargs = dict(payload)
+            if "prompt_cache_key" in request_kwargs:
+                request_kwargs["extra_body"] = {"prompt_cache_key": request_kwargs.pop("prompt_cache_key")}
+            if n > 1:
+                request_kwargs["n"] = n
+            if timeout is not None:
+                request_kwargs["timeout"] = timeout
+            response = await asyncio.to_thread(self.client.chat.completions.create, **request_kwargs)
+            return [choice.message.content for choice in response.choices]
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """粗略估计token数（中文约1字1token，英文约3-4字符1token）"""
+        return len(text.encode('utf-8')) // 3
+
     async def generate_response(self, prompt: str, mode: ReasoningMode,
-                               temperature: float = 0.7, max_tokens: int = 2048) -> str:
-        """生成响应"""
+                               temperature: float = 0.7, max_tokens: int = 2048,
+                               system_prompt: Optional[str] = None, coalesce: bool = True) -> str:
+        """生成响应（system_prompt 为按模式固定的静态前缀，作为system消息放在最前面；
+        coalesce=False 时不经微批器直接发送，单个同步调用没有可合并的并发请求，省去批窗口等待）"""
+        # 发送与缓存查找前先规范化，避免空白/Unicode写法差异导致缓存失效
+        prompt = _canonicalize(prompt)
+        if system_prompt is not None:
+            system_prompt = _canonicalize_static(system_prompt)
+
         if self.client is None:
             return self._simulate_response(prompt, mode)
 
-        try:
-            # 根据推理模式调整参数
-            if mode == ReasoningMode.NON_THINKING:
-                temperature = 0.3  # 更确定性的输出
-                max_tokens = 1024  # 较短的回答
-            elif mode == ReasoningMode.SIMPLIFIED:
-                temperature = 0.5
-                max_tokens = 1536
-            else:  # FULL_THINKING
-                temperature = 0.7
-                max_tokens = 2048  # 允许更长的详细回答
-
-            # 选择模型
-            model = self._get_model_for_mode(mode)
-
-            response = await asyncio.to_thread(
-                self.client.chat.completions.create,
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-
-            return response.choices[0].message.content
+        # 精确匹配缓存：最先查询，命中时连向量都不用计算
+        exact = mode == ReasoningMode.NON_THINKING
+        if exact:
+            cached_response = self.exact_cache.get(system_prompt, prompt)
+            if cached_response is not None:
+                return cached_response
 
+        try:
+            # 语义缓存：相近提示词直接复用响应
+            cache = self._semantic_cache_for(mode)
+            query_embedding = None
+            if cache is not None:
+                cached_response, query_embedding = cache.lookup(prompt, mode)
+                if cached_response is not None:
+                    return cached_response
+
+            payload = self._build_payload(prompt, mode, system_prompt)
+
+            # 经微批器发送：窗口内的相同请求合并为一次调用（完整思考模式各自取独立候选）
+            # 超时同时作用于实际的HTTP请求（请求被取消并释放并发名额）和调用方的等待
+            timeout = self.MODE_TIMEOUTS[mode]
+            batcher = self._get_batcher()  # 同时确保当前事件循环上的HTTP会话与信号量已创建
+            if coalesce:
+                request = batcher.submit(payload, shared=mode != ReasoningMode.FULL_THINKING,
+                                         timeout=timeout)
+            else:
+                request = self._dispatch_one(payload, timeout)
+            content = await asyncio.wait_for(request, timeout=timeout)
+
+            if exact:
+                self.exact_cache.put(system_prompt, prompt, content)
+            if cache is not None:
+                cache.put(prompt, mode, content, embedding=query_embedding)
+            return content
+
+        except asyncio.TimeoutError:
+            logger.warning("API调用超时（%s模式超过 %s 秒），使用模拟响应",
+                           mode.value, self.MODE_TIMEOUTS[mode])
+            return self._simulate_response(prompt, mode)
         except Exception as e:
-            print(f"API调用失败: {e}")
+            logger.warning("API调用失败: %s", e)
             return self._simulate_response(prompt, mode)
 
-    def _get_model_for_mode(self, mode: ReasoningMode) -> str:
-        """根据推理模式选择合适的模型"""
-        if self.api_type == "openai":
-            if mode == ReasoningMode.FULL_THINKING:
-                return "gpt-4-turbo-preview"  # 更强的推理能力
+    async def _dispatch_one(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        """不经微批器发送单个请求，返回第一个候选的文本"""
+        contents = await self._dispatch(payload, 1, timeout)
+        if not contents:
+            raise RuntimeError("API未返回任何候选")
+        return contents[0]
+
+    async def generate_response_stream(self, prompt: str, mode: ReasoningMode,
+                                       system_prompt: Optional[str] = None):
+        """流式生成响应（异步生成器，逐段产出文本，首段在预填充完成后即可到达）
+
+        缓存命中、模拟响应或未安装aiohttp时一次性产出完整文本；流式请求不经过微批器
+        """
+        prompt = _canonicalize(prompt)
+        if system_prompt is not None:
+            system_prompt = _canonicalize_static(system_prompt)
+
+        if self.client is None:
+            yield self._simulate_response(prompt, mode)
+            return
+
+        exact = mode == ReasoningMode.NON_THINKING
+        if exact:
+            cached_response = self.exact_cache.get(system_prompt, prompt)
+            if cached_response is not None:
+                yield cached_response
+                return
+
+        pieces = []
+        try:
+            cache = self._semantic_cache_for(mode)
+            query_embedding = None
+            if cache is not None:
+                cached_response, query_embedding = cache.lookup(prompt, mode)
+                if cached_response is not None:
+                    yield cached_response
+                    return
+
+            payload = self._build_payload(prompt, mode, system_prompt)
+            self._get_batcher()  # 确保当前事件循环上的HTTP会话与信号量已创建
+            if self._local.http is None:
+                pieces.extend(await self._dispatch(payload, timeout=self.MODE_TIMEOUTS[mode]))
+                yield pieces[0]
             else:
-                return "gpt-3.5-turbo"  # 更快速的响应
-        elif self.api_type == "deepseek":
-            return "deepseek-chat"
-        else:
-            return "default-model"
+                async for delta in self._stream_chat_completion(payload, self.MODE_TIMEOUTS[mode]):
+                    pieces.append(delta)
+                    yield delta
+
+            content = "".join(pieces)
+            if exact:
+                self.exact_cache.put(system_prompt, prompt, content)
+            if cache is not None:
+                cache.put(prompt, mode, content, embedding=query_embedding)
+
+        except Exception as e:
+            if pieces:
+                # 已经产出过部分文本：不能再拼接模拟响应，向调用方报错而不是静默截断
+                logger.warning("流式响应中断: %s", e)
+                raise
+            logger.warning("API调用失败: %s", e)
+            yield self._simulate_response(prompt, mode)
+
+    async def _stream_chat_completion(self, payload: Dict[str, Any], timeout: float):
+        """以SSE方式请求 /chat/completions，逐段产出增量文本（timeout 为整个流的总时长上限）"""
+        async with self._local.semaphore:
+            async with self._local.http.post(self._chat_completions_url(),
+                                       json={**payload, "stream": True},
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                response.raise_for_status()
+                async for line in response.content:
+                    line = line.strip()
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    choices = _json_loads(data)["choices"]
+                    delta = choices[0]["delta"].get("content") if choices else None
+                    if delta:
+                        yield delta
+
+    def _semantic_cache_for(self, mode: ReasoningMode) -> Optional[SemanticResponseCache]:
+        """该模式可用的语义缓存（完整思考模式在有随机性时不走缓存）"""
+        if mode == ReasoningMode.FULL_THINKING and self._mode_params[mode][0] > 0:
+            return None
+        return self.semantic_cache
+
+    def _build_payload(self, prompt: str, mode: ReasoningMode,
+                       system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """构造OpenAI兼容的请求体（参数与模型按推理模式查表）"""
+        temperature, max_tokens, model = self._mode_params[mode]
+
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt is not None:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if self.api_type == "openai":
+            # 同一模式的请求路由到同一缓存分片，提高前缀缓存命中率
+            payload["prompt_cache_key"] = mode.value
+        return payload
 
     def _simulate_response(self, prompt: str, mode: ReasoningMode) -> str:
         """模拟API响应（用于测试）"""
@@ -105,34 +752,99 @@ class LLMAPIClient:
         return template.format(answer="[模拟回答内容]")
 
 
+# 进程内共享的API客户端：键为 (API类型, 密钥的SHA-256摘要, 嵌入函数)，不以明文密钥作为键；
+# 容量有限，密钥轮换后旧客户端按LRU淘汰（仍在使用它的系统实例不受影响）
+_SHARED_CLIENTS: "OrderedDict[Tuple[str, Optional[str], Optional[Callable]], LLMAPIClient]" = OrderedDict()
+_SHARED_CLIENTS_LOCK = threading.Lock()
+_SHARED_CLIENTS_MAX = 8
+
+
+def _get_shared_client(api_type: str, api_key: Optional[str] = None,
+                       embed_fn: Optional[Callable[[str], Any]] = None) -> LLMAPIClient:
+    """进程内共享的API客户端（同一API类型、密钥与嵌入函数只创建一次，复用SDK客户端、连接池与响应缓存）"""
+    key = (api_type, hashlib.sha256(api_key.encode('utf-8')).hexdigest() if api_key else None, embed_fn)
+    with _SHARED_CLIENTS_LOCK:
+        client = _SHARED_CLIENTS.get(key)
+        if client is None:
+            client = _SHARED_CLIENTS[key] = LLMAPIClient(api_type, api_key, embed_fn=embed_fn)
+            while len(_SHARED_CLIENTS) > _SHARED_CLIENTS_MAX:
+                _SHARED_CLIENTS.popitem(last=False)
+        else:
+            _SHARED_CLIENTS.move_to_end(key)
+        return client
+
+
+@functools.lru_cache(maxsize=None)
+def _log_short_cache_prefixes(executor_cls: type):
+    """检查执行器类的静态前缀长度（模板是类属性，每个执行器类只需检查一次）"""
+    short_modes = [
+        mode.value for mode, prefix in executor_cls._PROMPT_TEMPLATES.items()
+        if LLMAPIClient.estimate_tokens(prefix) < LLMAPIClient.PROMPT_CACHE_MIN_TOKENS
+    ]
+    if short_modes:
+        logger.debug("以下模式的静态提示词前缀短于 %d tokens，不会命中OpenAI前缀缓存: %s",
+                     LLMAPIClient.PROMPT_CACHE_MIN_TOKENS, ', '.join(short_modes))
+
+
 class EnhancedReasoningExecutor(ReasoningExecutor):
     """增强版推理执行器，支持真实LLM API"""
 
     def __init__(self, api_client: LLMAPIClient):
         super().__init__()
         self.api_client = api_client
+        self._check_prompt_cache_prefixes()
+
+    def _check_prompt_cache_prefixes(self):
+        """静态前缀短于前缀缓存阈值时给出提示（否则缓存会静默失效）"""
+        if self.api_client.client is None or self.api_client.api_type != "openai":
+            return
+        _log_short_cache_prefixes(type(self))
 
     async def execute_reasoning_async(self, task_text: str, mode: ReasoningMode,
                                      features: TaskFeatures) -> str:
-        """异步执行推理"""
-        prompt = self.prompts[mode](task_text, features)
-        response = await self.api_client.generate_response(prompt, mode)
+        """异步执行推理（静态前缀作为system消息，任务文本作为user消息）"""
+        static_prefix, task_prompt = self.build_prompt_parts(task_text, mode)
+        response = await self.api_client.generate_response(
+            task_prompt, mode, system_prompt=static_prefix
+        )
         return response
 
+    async def execute_reasoning_stream(self, task_text: str, mode: ReasoningMode,
+                                       features: TaskFeatures):
+        """流式执行推理（异步生成器，逐段产出响应文本）"""
+        static_prefix, task_prompt = self.build_prompt_parts(task_text, mode)
+        async for delta in self.api_client.generate_response_stream(
+                task_prompt, mode, system_prompt=static_prefix):
+            yield delta
+
     def execute_reasoning(self, task_text: str, mode: ReasoningMode,
                          features: TaskFeatures) -> str:
-        """同步执行推理（兼容原接口）"""
-        return asyncio.run(self.execute_reasoning_async(task_text, mode, features))
+        """同步执行推理（兼容原接口；在API客户端的后台事件循环上执行，多次调用复用同一HTTP会话与连接）"""
+        static_prefix, task_prompt = self.build_prompt_parts(task_text, mode)
+        return self.api_client.run_sync(self.api_client.generate_response(
+            task_prompt, mode, system_prompt=static_prefix, coalesce=False
+        ))
 
 
 class ProductionAdaptiveReasoningSystem(AdaptiveReasoningSystem):
     """生产环境自适应推理系统"""
 
-    def __init__(self, api_type: str = "openai", api_key: str = None, config: Dict[str, Any] = None):
-        super().__init__()
+    # 同步 batch_process 的并发线程数（每个任务都要等待LLM API，I/O密集型）
+    BATCH_WORKERS = 4
 
-        # 初始化LLM API客户端
-        self.api_client = LLMAPIClient(api_type, api_key)
+    def __init__(self, api_type: str = "openai", api_key: str = None, config: Dict[str, Any] = None,
+                 embed_fn: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            embed_fn: 语义嵌入模型的编码函数（如 SentenceTransformer(...).encode）；提供时启用语义响应缓存
+        """
+        super().__init__(max_workers=self.BATCH_WORKERS)
+
+        # 在处理请求前完成复杂度核心的JIT编译（未安装numba时开销可忽略）
+        self.task_analyzer.warm_up()
+
+        # 获取共享的LLM API客户端（多个系统实例不重复初始化）
+        self.api_client = _get_shared_client(api_type, api_key or _DEFAULT_API_KEY, embed_fn)
 
         # 使用增强版推理执行器
         self.reasoning_executor = EnhancedReasoningExecutor(self.api_client)
@@ -141,6 +853,13 @@ class ProductionAdaptiveReasoningSystem(AdaptiveReasoningSystem):
         self.config = config or {}
         self._load_config()
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # 异步接口的HTTP会话绑定调用方的事件循环，退出时在同一循环中关闭
+        await self.api_client.aclose()
+
     def _load_config(self):
         """加载配置参数"""
         # 可以从配置文件或环境变量加载阈值等参数
@@ -148,14 +867,13 @@ class ProductionAdaptiveReasoningSystem(AdaptiveReasoningSystem):
         if thresholds:
             self.complexity_evaluator.mode_thresholds.update(thresholds)
 
-    async def process_task_async(self, task_text: str, task_id: Optional[str] = None):
-        """异步处理任务"""
-        import time
-
-        start_time = time.time()
+    async def process_task_async(self, task_text: str, task_id: Optional[str] = None,
+                                 stats_records: Optional[list] = None):
+        """异步处理任务（传入 stats_records 时统计记录追加到该列表，由调用方批量汇总）"""
+        start_ns = time.perf_counter_ns()
 
         if task_id is None:
-            task_id = f"task_{int(time.time() * 1000)}"
+            task_id = f"task_{next(self._id_counter)}"
 
         # 1. 分析任务特征
         features = self.task_analyzer.analyze_task(task_text)
@@ -169,13 +887,16 @@ class ProductionAdaptiveReasoningSystem(AdaptiveReasoningSystem):
             task_text, reasoning_mode, features
         )
 
-        execution_time = time.time() - start_time
+        execution_time_ns = time.perf_counter_ns() - start_ns
+        execution_time = execution_time_ns / 1e9
 
         # 4. 更新统计信息
-        self._update_stats(features.task_type, reasoning_mode, execution_time)
+        if stats_records is not None:
+            stats_records.append((features.task_type, reasoning_mode, execution_time_ns))
+        else:
+            self._update_stats(features.task_type, reasoning_mode, execution_time_ns)
 
         # 5. 构造结果
-        from adaptive_reasoning_system import ReasoningResult
         result = ReasoningResult(
             task_id=task_id,
             reasoning_mode=reasoning_mode,
@@ -191,36 +912,52 @@ class ProductionAdaptiveReasoningSystem(AdaptiveReasoningSystem):
 
         return result
 
+    async def stream_task_async(self, task_text: str):
+        """流式处理任务（异步生成器，逐段产出响应文本；流结束或被关闭后计入统计）"""
+        start_ns = time.perf_counter_ns()
+
+        features = self.task_analyzer.analyze_task(task_text)
+        reasoning_mode = self.complexity_evaluator.evaluate_reasoning_mode(features)
+
+        try:
+            async for delta in self.reasoning_executor.execute_reasoning_stream(
+                    task_text, reasoning_mode, features):
+                yield delta
+        finally:
+            # 调用方提前停止迭代（关闭生成器）或流出错时同样计入统计
+            self._update_stats(features.task_type, reasoning_mode, time.perf_counter_ns() - start_ns)
+
     async def batch_process_async(self, tasks: list):
-        """异步批量处理任务"""
-        # 使用asyncio.gather并发处理任务
-        coroutines = []
-
-        for i, task_info in enumerate(tasks):
-            task_text = task_info.get('text', task_info.get('task', ''))
-            task_id = task_info.get('id', f"batch_task_{i}")
-            coroutines.append(self.process_task_async(task_text, task_id))
-
-        results = await asyncio.gather(*coroutines, return_exceptions=True)
-
-        # 处理异常
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                from adaptive_reasoning_system import ReasoningResult
-                error_result = ReasoningResult(
-                    task_id=tasks[i].get('id', f"batch_task_{i}"),
-                    reasoning_mode=ReasoningMode.NON_THINKING,
-                    response=f"错误: {str(result)}",
-                    execution_time=0.0,
-                    confidence_score=0.0,
-                    metadata={'error': str(result)}
-                )
-                processed_results.append(error_result)
-            else:
-                processed_results.append(result)
+        """异步批量处理任务（结果顺序与输入一致）"""
+        # 每个任务自行把异常转换为错误结果，gather 无需 return_exceptions，也无需事后逐个检查
+        stats_records = []
+        results = await asyncio.gather(*(
+            self._process_batch_item_async(i, task_info, stats_records)
+            for i, task_info in enumerate(tasks)
+        ))
+
+        # 整批统计一次性汇总
+        self._update_stats_batch(stats_records)
+        return results
+
+    async def _process_batch_item_async(self, index: int, task_info: Dict[str, str],
+                                        stats_records: Optional[list] = None) -> ReasoningResult:
+        """异步处理批量中的单个任务，出错时返回错误结果"""
+        task_text = task_info.get('text', task_info.get('task', ''))
+        task_id = task_info.get('id', f"batch_task_{index}")
 
-        return processed_results
+        try:
+            return await self.process_task_async(task_text, task_id, stats_records)
+        except Exception as e:
+            logger.error("处理任务 %s 时发生错误: %s", task_id, e)
+            return ReasoningResult(
+                task_id=task_id,
+                reasoning_mode=ReasoningMode.NON_THINKING,
+                response=f"错误: {str(e)}",
+                execution_time=0.0,
+                confidence_score=0.0,
+                metadata={'error': str(e)}
+            )
 
     def save_config(self, filename: str = "system_config.json"):
         """保存系统配置"""
@@ -230,30 +967,77 @@ class ProductionAdaptiveReasoningSystem(AdaptiveReasoningSystem):
             "stats": self.stats
         }
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, ensure_ascii=False, indent=2)
-
-        print(f"配置已保存到: {filename}")
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(config_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(config_data, f, ensure_ascii=False, indent=2)
+
+        logger.info("配置已保存到: %s", filename)
+
+        # 响应缓存与配置文件放在一起
+        exact_cache = self.api_client.exact_cache
+        if len(exact_cache):
+            cache_file = self._exact_cache_file(filename)
+            exact_cache.save(cache_file)
+            logger.info("精确匹配缓存已保存到: %s", cache_file)
+
+        cache = self.api_client.semantic_cache
+        if cache is not None and len(cache):
+            cache_file = self._semantic_cache_file(filename)
+            cache.save(cache_file)
+            logger.info("语义缓存已保存到: %s", cache_file)
+
+    @staticmethod
+    def _exact_cache_file(filename: str) -> str:
+        """配置文件对应的精确匹配缓存文件路径"""
+        return os.path.splitext(filename)[0] + "_exact_cache.json"
+
+    @staticmethod
+    def _semantic_cache_file(filename: str) -> str:
+        """配置文件对应的语义缓存文件路径"""
+        return os.path.splitext(filename)[0] + "_semantic_cache.npz"
 
     @classmethod
-    def load_from_config(cls, filename: str = "system_config.json"):
-        """从配置文件加载系统"""
+    def load_from_config(cls, filename: str = "system_config.json",
+                         embed_fn: Optional[Callable[[str], Any]] = None):
+        """从配置文件加载系统（提供 embed_fn 时启用语义缓存并恢复其缓存文件）"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            if orjson is not None:
+                with open(filename, 'rb') as f:
+                    config_data = orjson.loads(f.read())
+            else:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    config_data = json.load(f)
 
             api_type = config_data.get("api_type", "openai")
-            system = cls(api_type=api_type, config=config_data)
-
-            print(f"从配置文件 {filename} 加载系统成功")
+            system = cls(api_type=api_type, config=config_data, embed_fn=embed_fn)
+
+            # API客户端在系统实例间共享：缓存文件先读入新实例再并入，不清掉其他实例正在使用的缓存条目
+            exact_cache = system.api_client.exact_cache
+            exact_cache_file = cls._exact_cache_file(filename)
+            if os.path.exists(exact_cache_file):
+                loaded = ExactResponseCache(exact_cache.max_entries)
+                loaded.load(exact_cache_file)
+                exact_cache.merge(loaded)
+
+            cache = system.api_client.semantic_cache
+            cache_file = cls._semantic_cache_file(filename)
+            if cache is not None and os.path.exists(cache_file):
+                loaded = SemanticResponseCache(cache.embed_fn, cache.max_entries, cache.thresholds)
+                loaded.load(cache_file)
+                cache.merge(loaded)
+
+            logger.info("从配置文件 %s 加载系统成功", filename)
             return system
 
         except FileNotFoundError:
-            print(f"配置文件 {filename} 不存在，使用默认配置")
-            return cls()
+            logger.warning("配置文件 %s 不存在，使用默认配置", filename)
+            return cls(embed_fn=embed_fn)
         except Exception as e:
-            print(f"加载配置文件失败: {e}，使用默认配置")
-            return cls()
+            logger.warning("加载配置文件失败: %s，使用默认配置", e)
+            return cls(embed_fn=embed_fn)
 
 
 async def demo_production_system():
@@ -320,12 +1104,17 @@ def create_web_api_example():
     """创建Web API示例"""
 
     web_api_code = '''
-from flask import Flask, request, jsonify
-import asyncio
+from flask import Flask, Response, request, stream_with_context
+import orjson
 from llm_integration_example import ProductionAdaptiveReasoningSystem
 
 app = Flask(__name__)
 
+
+def json_response(payload, status=200):
+    """用orjson序列化响应（直接得到UTF-8字节，dataclass与枚举可原生序列化）"""
+    return Response(orjson.dumps(payload), status=status, mimetype="application/json")
+
 # 初始化全局系统实例
 reasoning_system = ProductionAdaptiveReasoningSystem.load_from_config()
 
@@ -338,22 +1127,44 @@ def reason_endpoint():
         task_id = data.get('task_id')
 
         if not task_text:
-            return jsonify({"error": "缺少task参数"}), 400
+            return json_response({"error": "缺少task参数"}, 400)
 
         # 同步处理
         result = reasoning_system.process_task(task_text, task_id)
 
-        return jsonify({
-            "task_id": result.task_id,
-            "reasoning_mode": result.reasoning_mode.value,
-            "response": result.response,
-            "execution_time": result.execution_time,
-            "confidence_score": result.confidence_score,
-            "metadata": result.metadata
-        })
+        return json_response({**result.to_dict(), "metadata": result.metadata})
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
+
+@app.route('/api/reason/stream', methods=['POST'])
+def reason_stream_endpoint():
+    """流式推理API端点（SSE，每个事件携带一段增量文本）"""
+    data = request.get_json()
+    task_text = data.get('task', '')
+
+    if not task_text:
+        return json_response({"error": "缺少task参数"}, 400)
+
+    async def next_delta(stream):
+        return await stream.__anext__()
+
+    def events():
+        # Flask 视图是同步的：在API客户端的后台事件循环上逐段驱动异步生成器（复用其HTTP会话）
+        run_sync = reasoning_system.api_client.run_sync
+        stream = reasoning_system.stream_task_async(task_text)
+        try:
+            while True:
+                try:
+                    delta = run_sync(next_delta(stream))
+                except StopAsyncIteration:
+                    break
+                yield b"data: " + orjson.dumps({"delta": delta}) + b"\\n\\n"
+            yield b"data: [DONE]\\n\\n"
+        finally:
+            run_sync(stream.aclose())
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream")
 
 @app.route('/api/batch_reason', methods=['POST'])
 def batch_reason_endpoint():
@@ -363,37 +1174,23 @@ def batch_reason_endpoint():
         tasks = data.get('tasks', [])
 
         if not tasks:
-            return jsonify({"error": "缺少tasks参数"}), 400
+            return json_response({"error": "缺少tasks参数"}, 400)
 
-        # 异步批量处理
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        results = loop.run_until_complete(
+        # 异步批量处理（在API客户端的后台事件循环上执行，各请求复用同一HTTP会话与连接）
+        results = reasoning_system.api_client.run_sync(
             reasoning_system.batch_process_async(tasks)
         )
-        loop.close()
 
-        # 序列化结果
-        response_data = []
-        for result in results:
-            response_data.append({
-                "task_id": result.task_id,
-                "reasoning_mode": result.reasoning_mode.value,
-                "response": result.response,
-                "execution_time": result.execution_time,
-                "confidence_score": result.confidence_score
-            })
-
-        return jsonify({"results": response_data})
+        return json_response({"results": [result.to_dict() for result in results]})
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
 @app.route('/api/stats', methods=['GET'])
 def stats_endpoint():
     """统计信息API端点"""
     stats = reasoning_system.get_statistics()
-    return jsonify(stats)
+    return json_response(stats)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -483,6 +1280,13 @@ if __name__ == "__main__":
     print("展示如何将自适应推理系统与真实LLM API集成")
     print("=" * 60)
 
+    # 可选：uvloop 事件循环（I/O密集的并发请求吞吐更高）
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     # 运行演示
     asyncio.run(demo_production_system())
 
@@ -492,6 +1296,6 @@ if __name__ == "__main__":
 
     print("\n集成示例创建完成！")
     print("\n下一步:")
-    print("1. 安装依赖: pip install openai flask")
+    print("1. 安装依赖: pip install openai aiohttp flask")
     print("2. 设置API密钥: export LLM_API_KEY='your_api_key'")
     print("3. 运行Web API: python web_api_example.py")
\ No newline at end of file
@@ -5,16 +5,21 @@
 """
 
 import os
+import asyncio
 from llm_integration_example import ProductionAdaptiveReasoningSystem
 
+# API密钥（模块导入时从环境变量读取一次）
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 
-def main():
+
+async def main():
     print("🤖 自适应推理系统 - 真实LLM演示")
     print("=" * 50)
 
     # 检查API密钥
-    openai_key = os.getenv("OPENAI_API_KEY")
-    deepseek_key = os.getenv("DEEPSEEK_API_KEY")
+    openai_key = OPENAI_API_KEY
+    deepseek_key = DEEPSEEK_API_KEY
 
     if not openai_key and not deepseek_key:
         print("❌ 未检测到API密钥")
@@ -79,14 +84,19 @@ def main():
     print("🎯 开始测试...")
     print()
 
-    for i, task in enumerate(demo_tasks, 1):
+    # 所有任务并发提交，共用同一个HTTP连接池
+    results = await system.batch_process_async(
+        [{"id": f"demo_{i}", "text": task["text"]} for i, task in enumerate(demo_tasks, 1)]
+    )
+    await system.api_client.aclose()
+
+    for i, (task, result) in enumerate(zip(demo_tasks, results), 1):
         print(f"📝 任务 {i}: {task['text']}")
         print(f"💡 预期: {task['expected']}")
 
-        try:
-            # 处理任务
-            result = system.process_task(task["text"], f"demo_{i}")
-
+        if 'error' in result.metadata:
+            print(f"❌ 处理失败: {result.metadata['error']}")
+        else:
             print(f"🎯 实际选择: {result.reasoning_mode.value}")
             print(f"📊 复杂度分数: {result.metadata['complexity_score']:.1f}")
             print(f"🎯 置信度: {result.confidence_score:.1%}")
@@ -94,9 +104,6 @@ def main():
             print("📄 LLM响应:")
             print(result.response[:200] + "..." if len(result.response) > 200 else result.response)
 
-        except Exception as e:
-            print(f"❌ 处理失败: {e}")
-
         print("=" * 60)
 
     # 显示统计
@@ -107,4 +114,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
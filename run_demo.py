@@ -4,11 +4,13 @@
 支持环境变量和交互式输入
 """
 
+import asyncio
+
 from config import get_deepseek_api_key, DEEPSEEK_API_KEY
 from llm_integration_example import ProductionAdaptiveReasoningSystem
 
 
-def main():
+async def main():
     print("🤖 自适应推理系统 - DeepSeek API 演示")
     print("=" * 60)
     print()
@@ -68,16 +70,21 @@ def main():
     print("🎯 开始测试 (共4个任务)...")
     print()
 
-    for i, task in enumerate(demo_tasks, 1):
+    # 所有任务并发提交，共用同一个HTTP连接池（避免逐任务重新建立连接）
+    results = await system.batch_process_async(
+        [{"id": f"demo_{i}", "text": task["text"]} for i, task in enumerate(demo_tasks, 1)]
+    )
+    await system.api_client.aclose()
+
+    for i, (task, result) in enumerate(zip(demo_tasks, results), 1):
         print("=" * 60)
         print(f"📝 任务 {i}/{len(demo_tasks)}: {task['text']}")
         print(f"💡 预期推理模式: {task['expected']}")
         print()
 
-        try:
-            # 处理任务
-            result = system.process_task(task["text"], f"demo_{i}")
-
+        if 'error' in result.metadata:
+            print(f"❌ 处理失败: {result.metadata['error']}")
+        else:
             print(f"🧠 选择模式: {result.reasoning_mode.value}")
             print(f"📊 复杂度分数: {result.metadata.get('complexity_score', 0):.1f}")
             print(f"✅ 置信度: {result.confidence_score:.1%}")
@@ -92,11 +99,6 @@ def main():
                 print(f"\n... (还有 {len(result.response) - 500} 个字符)")
             print("-" * 60)
 
-        except Exception as e:
-            print(f"❌ 处理失败: {e}")
-            import traceback
-            traceback.print_exc()
-
         print()
 
     # 显示统计
@@ -117,4 +119,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -49,6 +49,11 @@ setup(
             "matplotlib>=3.4.0",
             "seaborn>=0.11.0",
         ],
+        "fast": [
+            "uvloop>=0.17.0; sys_platform != 'win32'",
+            "numba>=0.58",
+            "pyahocorasick>=2.0.0",
+        ],
     },
     entry_points={
         "console_scripts": [
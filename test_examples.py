@@ -4,150 +4,103 @@
 基于DeepSeek-V3实验数据验证系统性能
 """
 
+import gc
+import sys
 import json
 import time
+import operator
+from statistics import fmean
+from dataclasses import dataclass, asdict
+from typing import Optional
 from adaptive_reasoning_system import (
     AdaptiveReasoningSystem, ReasoningMode, TaskType
 )
 
+try:
+    import orjson  # 更快的JSON序列化（直接输出UTF-8字节）
+except ImportError:
+    orjson = None
 
-def run_deepseek_validation_tests():
-    """运行基于DeepSeek-V3数据的验证测试"""
 
-    system = AdaptiveReasoningSystem()
+@dataclass(frozen=True)
+class ValidationCase:
+    """验证测试用例"""
+    id: str
+    text: str
+    expected_mode: ReasoningMode
+    category_id: int             # CATEGORY_NAMES 中的下标
 
-    # 基于论文中的实验数据构造测试用例
-    test_cases = [
-        # 编程任务（应该优选非思考模式）
-        {
-            "id": "codeforces_1",
-            "text": "编写一个Python函数，实现快速排序算法",
-            "expected_mode": ReasoningMode.NON_THINKING,
-            "category": "编程-算法实现"
-        },
-        {
-            "id": "codeforces_2",
-            "text": "给定一个整数数组，找出其中没有重复元素的最长子数组的长度",
-            "expected_mode": ReasoningMode.NON_THINKING,
-            "category": "编程-数据结构"
-        },
-        {
-            "id": "codeforces_3",
-            "text": "实现一个LRU缓存类，支持get和put操作",
-            "expected_mode": ReasoningMode.SIMPLIFIED,  # 稍复杂的设计
-            "category": "编程-系统设计"
-        },
-
-        # 数学推理任务（应该优选完整思考模式）
-        {
-            "id": "hmmt_1",
-            "text": "证明：对于任意正整数n，1+2+3+...+n = n(n+1)/2",
-            "expected_mode": ReasoningMode.FULL_THINKING,
-            "category": "数学-证明"
-        },
-        {
-            "id": "hmmt_2",
-            "text": "求解方程组：x²+y²=25, x+y=7，并验证所有解",
-            "expected_mode": ReasoningMode.FULL_THINKING,
-            "category": "数学-方程求解"
-        },
-        {
-            "id": "hmmt_3",
-            "text": "计算定积分∫[0,π] sin(x)dx的值",
-            "expected_mode": ReasoningMode.SIMPLIFIED,  # 标准积分
-            "category": "数学-积分计算"
-        },
-
-        # 简单问答（应该使用非思考模式）
-        {
-            "id": "qa_1",
-            "text": "什么是机器学习？",
-            "expected_mode": ReasoningMode.NON_THINKING,
-            "category": "简单问答"
-        },
-        {
-            "id": "qa_2",
-            "text": "请列出Python的基本数据类型",
-            "expected_mode": ReasoningMode.NON_THINKING,
-            "category": "简单问答"
-        },
-
-        # 复杂推理任务
-        {
-            "id": "complex_1",
-            "text": "分析深度学习中梯度消失问题的成因，并提出三种解决方案",
-            "expected_mode": ReasoningMode.FULL_THINKING,
-            "category": "复杂推理"
-        },
-        {
-            "id": "complex_2",
-            "text": "设计一个分布式系统架构来处理每秒100万次请求",
-            "expected_mode": ReasoningMode.SIMPLIFIED,
-            "category": "系统设计"
-        }
-    ]
+    @property
+    def category(self) -> str:
+        return CATEGORY_NAMES[self.category_id]
 
-    print("=== DeepSeek-V3 验证测试开始 ===\n")
 
-    correct_predictions = 0
-    total_tests = len(test_cases)
-    results = []
+@dataclass(frozen=True)
+class BenchmarkTask:
+    """基准测试任务"""
+    id: str
+    text: str
+    complexity_id: int           # COMPLEXITY_LABELS 中的下标
 
-    for test_case in test_cases:
-        result = system.process_task(test_case["text"], test_case["id"])
+    @property
+    def complexity_label(self) -> str:
+        return COMPLEXITY_LABELS[self.complexity_id]
 
-        # 检查模式预测是否正确
-        is_correct = result.reasoning_mode == test_case["expected_mode"]
-        if is_correct:
-            correct_predictions += 1
 
-        results.append({
-            "test_case": test_case,
-            "result": result,
-            "is_correct": is_correct
-        })
-
-        print(f"测试用例: {test_case['id']} ({test_case['category']})")
-        print(f"任务: {test_case['text'][:50]}...")
-        print(f"期望模式: {test_case['expected_mode'].value}")
-        print(f"实际模式: {result.reasoning_mode.value}")
-        print(f"预测正确: {'✓' if is_correct else '✗'}")
-        print(f"置信度: {result.confidence_score:.3f}")
-        print(f"复杂度分数: {result.metadata['complexity_score']:.1f}")
-        print("-" * 60)
-
-    accuracy = correct_predictions / total_tests
-    print(f"\n=== 验证结果汇总 ===")
-    print(f"总测试用例: {total_tests}")
-    print(f"预测正确: {correct_predictions}")
-    print(f"准确率: {accuracy:.2%}")
-
-    # 按类别统计
-    category_stats = {}
-    for r in results:
-        category = r["test_case"]["category"]
-        if category not in category_stats:
-            category_stats[category] = {"correct": 0, "total": 0}
-        category_stats[category]["total"] += 1
-        if r["is_correct"]:
-            category_stats[category]["correct"] += 1
-
-    print(f"\n=== 按类别统计 ===")
-    for category, stats in category_stats.items():
-        acc = stats["correct"] / stats["total"]
-        print(f"{category}: {stats['correct']}/{stats['total']} ({acc:.2%})")
-
-    return results
+# 用例类别（按首次出现的顺序，统计结果也按此顺序输出）
+CATEGORY_NAMES = (
+    "编程-算法实现", "编程-数据结构", "编程-系统设计",
+    "数学-证明", "数学-方程求解", "数学-积分计算",
+    "简单问答", "复杂推理", "系统设计",
+)
+_CATEGORY = {name: index for index, name in enumerate(CATEGORY_NAMES)}
+
+# 推理模式按枚举定义顺序排列，计数列表的下标即模式在其中的位置
+REASONING_MODES = list(ReasoningMode)
+_MODE_INDEX = {mode: index for index, mode in enumerate(REASONING_MODES)}
+
+# 基于论文中的实验数据构造测试用例
+VALIDATION_CASES = (
+    # 编程任务（应该优选非思考模式）
+    ValidationCase("codeforces_1", "编写一个Python函数，实现快速排序算法",
+                   ReasoningMode.NON_THINKING, _CATEGORY["编程-算法实现"]),
+    ValidationCase("codeforces_2", "给定一个整数数组，找出其中没有重复元素的最长子数组的长度",
+                   ReasoningMode.NON_THINKING, _CATEGORY["编程-数据结构"]),
+    ValidationCase("codeforces_3", "实现一个LRU缓存类，支持get和put操作",
+                   ReasoningMode.SIMPLIFIED, _CATEGORY["编程-系统设计"]),  # 稍复杂的设计
+
+    # 数学推理任务（应该优选完整思考模式）
+    ValidationCase("hmmt_1", "证明：对于任意正整数n，1+2+3+...+n = n(n+1)/2",
+                   ReasoningMode.FULL_THINKING, _CATEGORY["数学-证明"]),
+    ValidationCase("hmmt_2", "求解方程组：x²+y²=25, x+y=7，并验证所有解",
+                   ReasoningMode.FULL_THINKING, _CATEGORY["数学-方程求解"]),
+    ValidationCase("hmmt_3", "计算定积分∫[0,π] sin(x)dx的值",
+                   ReasoningMode.SIMPLIFIED, _CATEGORY["数学-积分计算"]),  # 标准积分
+
+    # 简单问答（应该使用非思考模式）
+    ValidationCase("qa_1", "什么是机器学习？",
+                   ReasoningMode.NON_THINKING, _CATEGORY["简单问答"]),
+    ValidationCase("qa_2", "请列出Python的基本数据类型",
+                   ReasoningMode.NON_THINKING, _CATEGORY["简单问答"]),
+
+    # 复杂推理任务
+    ValidationCase("complex_1", "分析深度学习中梯度消失问题的成因，并提出三种解决方案",
+                   ReasoningMode.FULL_THINKING, _CATEGORY["复杂推理"]),
+    ValidationCase("complex_2", "设计一个分布式系统架构来处理每秒100万次请求",
+                   ReasoningMode.SIMPLIFIED, _CATEGORY["系统设计"]),
+)
 
+# 与 VALIDATION_CASES 按位置对应的期望模式和类别编号
+VALIDATION_EXPECTED_MODES = tuple(case.expected_mode for case in VALIDATION_CASES)
+VALIDATION_CATEGORY_IDS = tuple(case.category_id for case in VALIDATION_CASES)
 
-def run_performance_benchmark():
-    """运行性能基准测试"""
 
-    system = AdaptiveReasoningSystem()
+# 基准任务的复杂度标签（统计结果按此顺序输出）
+COMPLEXITY_LABELS = ("简单", "中等", "复杂")
 
-    # 生成不同复杂度的测试任务
-    benchmark_tasks = []
 
+def _build_benchmark_tasks():
+    """生成不同复杂度的基准测试任务"""
     # 简单任务 (应该用非思考模式，节省时间)
     simple_tasks = [
         "1+1等于多少？",
@@ -175,98 +128,171 @@ def run_performance_benchmark():
         "设计一个大规模推荐系统的完整架构"
     ]
 
-    # 构造基准测试集
-    task_id = 1
-    for task_list, complexity_label in [
-        (simple_tasks, "简单"),
-        (medium_tasks, "中等"),
-        (complex_tasks, "复杂")
-    ]:
-        for task_text in task_list:
-            benchmark_tasks.append({
-                "id": f"benchmark_{task_id}",
-                "text": task_text,
-                "complexity_label": complexity_label
-            })
-            task_id += 1
-
-    print("=== 性能基准测试开始 ===\n")
-
-    start_time = time.time()
-    results = system.batch_process(benchmark_tasks)
-    total_time = time.time() - start_time
+    # 构造基准测试集（任务列表与 COMPLEXITY_LABELS 一一对应）
+    labeled_texts = [
+        (complexity_id, task_text)
+        for complexity_id, task_list in enumerate((simple_tasks, medium_tasks, complex_tasks))
+        for task_text in task_list
+    ]
+    return tuple(
+        BenchmarkTask(f"benchmark_{task_id}", task_text, complexity_id)
+        for task_id, (complexity_id, task_text) in enumerate(labeled_texts, 1)
+    )
+
+
+BENCHMARK_TASKS = _build_benchmark_tasks()
+
+# 自适应优化演示：相同问题在不同表述下的处理差异（任务文本, 说明）
+DEMO_TASKS = (
+    ("写一个排序函数", "简单请求 - 应该用非思考模式"),
+    ("请详细分析各种排序算法的时间复杂度和空间复杂度，并给出最优选择建议", "复杂分析 - 应该用完整思考模式"),
+    ("实现快速排序并简单说明原理", "中等复杂度 - 应该用简化模式"),
+)
+
+
+def run_deepseek_validation_tests(system: Optional[AdaptiveReasoningSystem] = None):
+    """运行基于DeepSeek-V3数据的验证测试（可传入已有的系统实例，在多个测试之间共享）"""
+
+    if system is None:
+        system = AdaptiveReasoningSystem()
+    test_cases = VALIDATION_CASES
+
+    # 输出按行收集，函数结束时拼接后一次性写出
+    lines = ["=== DeepSeek-V3 验证测试开始 ===\n"]
+
+    total_tests = len(test_cases)
+    results = []
+
+    # 整批处理所有用例（特征分析在 batch_process 中一次完成）
+    batch_results = system.batch_process(
+        {"id": test_case.id, "text": test_case.text} for test_case in test_cases
+    )
+
+    # 检查模式预测是否正确（与期望模式表逐位置比对）
+    correct_flags = list(map(operator.eq,
+                             (result.reasoning_mode for result in batch_results),
+                             VALIDATION_EXPECTED_MODES))
+    correct_predictions = sum(correct_flags)
+
+    for test_case, result, is_correct in zip(test_cases, batch_results, correct_flags):
+        results.append({
+            "test_case": test_case,
+            "result": result,
+            "is_correct": is_correct
+        })
+
+        lines.extend((
+            f"测试用例: {test_case.id} ({test_case.category})",
+            f"任务: {test_case.text[:50]}...",
+            f"期望模式: {test_case.expected_mode.value}",
+            f"实际模式: {result.reasoning_mode.value}",
+            f"预测正确: {'✓' if is_correct else '✗'}",
+            f"置信度: {result.confidence_score:.3f}",
+            f"复杂度分数: {result.metadata['complexity_score']:.1f}",
+            "-" * 60,
+        ))
+
+    accuracy = correct_predictions / total_tests
+    lines.append(f"\n=== 验证结果汇总 ===")
+    lines.append(f"总测试用例: {total_tests}")
+    lines.append(f"预测正确: {correct_predictions}")
+    lines.append(f"准确率: {accuracy:.2%}")
+    lines.append(f"结果元数据可JSON序列化: {'✓' if _metadata_serializable(batch_results[0]) else '✗'}")
+
+    # 按类别统计（类别已编号，直接按下标累加）
+    category_totals = [0] * len(CATEGORY_NAMES)
+    category_correct = [0] * len(CATEGORY_NAMES)
+    for category_id, is_correct in zip(VALIDATION_CATEGORY_IDS, correct_flags):
+        category_totals[category_id] += 1
+        category_correct[category_id] += is_correct
+
+    lines.append(f"\n=== 按类别统计 ===")
+    for category, correct, total in zip(CATEGORY_NAMES, category_correct, category_totals):
+        if total:
+            lines.append(f"{category}: {correct}/{total} ({correct / total:.2%})")
+
+    sys.stdout.write("\n".join(lines) + "\n")
+    return results
+
+
+def run_performance_benchmark(system: Optional[AdaptiveReasoningSystem] = None):
+    """运行性能基准测试（可传入已有的系统实例，在多个测试之间共享）"""
+
+    if system is None:
+        system = AdaptiveReasoningSystem()
+
+    benchmark_tasks = BENCHMARK_TASKS
+    batch = [{"id": task.id, "text": task.text} for task in benchmark_tasks]
+
+    # 输出按行收集，函数结束时拼接后一次性写出，计时区间内不做任何I/O
+    lines = ["=== 性能基准测试开始 ===\n"]
+
+    # 预热：触发复杂度核心的JIT编译并走一遍批量分析路径（不计入统计），避免一次性开销计入计时
+    system.task_analyzer.warm_up()
+    system.task_analyzer.analyze_tasks(["warmup"])
+
+    # 计时区间内暂停垃圾回收，避免回收停顿干扰测量
+    gc.collect()
+    gc.disable()
+    try:
+        start_ns = time.perf_counter_ns()
+        results = system.batch_process(batch)
+        total_ns = time.perf_counter_ns() - start_ns
+    finally:
+        gc.enable()
 
     # 统计分析
-    mode_usage = {mode.value: 0 for mode in ReasoningMode}
-    complexity_stats = {}
-
-    for i, result in enumerate(results):
-        mode_usage[result.reasoning_mode.value] += 1
-
-        complexity_label = benchmark_tasks[i]["complexity_label"]
-        if complexity_label not in complexity_stats:
-            complexity_stats[complexity_label] = {
-                "count": 0,
-                "avg_time": 0,
-                "modes": {mode.value: 0 for mode in ReasoningMode}
-            }
+    mode_usage = [0] * len(REASONING_MODES)
+    # 按复杂度编号索引：耗时先收集，平均值在输出时一次算出
+    times_by_complexity = [[] for _ in COMPLEXITY_LABELS]
+    modes_by_complexity = [[0] * len(REASONING_MODES) for _ in COMPLEXITY_LABELS]
 
-        stats = complexity_stats[complexity_label]
-        stats["count"] += 1
-        stats["avg_time"] = (stats["avg_time"] * (stats["count"] - 1) + result.execution_time) / stats["count"]
-        stats["modes"][result.reasoning_mode.value] += 1
+    for task, result in zip(benchmark_tasks, results):
+        mode_index = _MODE_INDEX[result.reasoning_mode]
+        mode_usage[mode_index] += 1
 
-    print(f"总耗时: {total_time:.3f}秒")
-    print(f"平均每任务: {total_time/len(results):.3f}秒")
-    print(f"总任务数: {len(results)}")
+        complexity_id = task.complexity_id
+        times_by_complexity[complexity_id].append(result.execution_time)
+        modes_by_complexity[complexity_id][mode_index] += 1
 
-    print(f"\n=== 推理模式使用统计 ===")
-    for mode, count in mode_usage.items():
-        percentage = count / len(results) * 100
-        print(f"{mode}: {count} ({percentage:.1f}%)")
-
-    print(f"\n=== 按复杂度统计 ===")
-    for complexity, stats in complexity_stats.items():
-        print(f"\n{complexity}任务:")
-        print(f"  数量: {stats['count']}")
-        print(f"  平均耗时: {stats['avg_time']:.3f}秒")
-        print(f"  模式分布: ", end="")
-        for mode, count in stats['modes'].items():
-            if count > 0:
-                print(f"{mode}:{count} ", end="")
-        print()
+    lines.append(f"总耗时: {total_ns / 1e9:.6f}秒")
+    lines.append(f"平均每任务: {total_ns / len(results) / 1e9:.6f}秒")
+    lines.append(f"总任务数: {len(results)}")
 
+    lines.append(f"\n=== 推理模式使用统计 ===")
+    for mode, count in zip(REASONING_MODES, mode_usage):
+        percentage = count / len(results) * 100
+        lines.append(f"{mode.value}: {count} ({percentage:.1f}%)")
+
+    lines.append(f"\n=== 按复杂度统计 ===")
+    for complexity, times, mode_counts in zip(COMPLEXITY_LABELS, times_by_complexity,
+                                              modes_by_complexity):
+        if not times:
+            continue
+        lines.append(f"\n{complexity}任务:")
+        lines.append(f"  数量: {len(times)}")
+        lines.append(f"  平均耗时: {fmean(times):.3f}秒")
+        lines.append("  模式分布: " + "".join(
+            f"{mode.value}:{count} " for mode, count in zip(REASONING_MODES, mode_counts) if count > 0
+        ))
+
+    sys.stdout.write("\n".join(lines) + "\n")
     return results
 
 
-def run_adaptive_optimization_demo():
-    """运行自适应优化演示"""
+def run_adaptive_optimization_demo(system: Optional[AdaptiveReasoningSystem] = None):
+    """运行自适应优化演示（可传入已有的系统实例，在多个测试之间共享）"""
 
-    system = AdaptiveReasoningSystem()
+    if system is None:
+        system = AdaptiveReasoningSystem()
 
     print("=== 自适应优化演示 ===\n")
 
-    # 演示相同问题在不同表述下的处理差异
-    similar_tasks = [
-        {
-            "text": "写一个排序函数",
-            "description": "简单请求 - 应该用非思考模式"
-        },
-        {
-            "text": "请详细分析各种排序算法的时间复杂度和空间复杂度，并给出最优选择建议",
-            "description": "复杂分析 - 应该用完整思考模式"
-        },
-        {
-            "text": "实现快速排序并简单说明原理",
-            "description": "中等复杂度 - 应该用简化模式"
-        }
-    ]
-
-    for i, task in enumerate(similar_tasks, 1):
-        print(f"示例 {i}: {task['description']}")
-        print(f"任务: {task['text']}")
+    for i, (task_text, description) in enumerate(DEMO_TASKS, 1):
+        print(f"示例 {i}: {description}")
+        print(f"任务: {task_text}")
 
-        result = system.process_task(task["text"], f"demo_{i}")
+        result = system.process_task(task_text, f"demo_{i}")
 
         print(f"选择模式: {result.reasoning_mode.value}")
         print(f"复杂度分数: {result.metadata['complexity_score']:.1f}")
@@ -282,37 +308,64 @@ def run_adaptive_optimization_demo():
         print(f"{key}: {value}")
 
 
-def export_test_results(results, filename="test_results.json"):
-    """导出测试结果到JSON文件"""
+def _metadata_serializable(result) -> bool:
+    """检查结果元数据（含特征对象）能否JSON序列化（Web API 会把 metadata 原样返回给调用方）"""
+    try:
+        if orjson is not None:
+            orjson.dumps(result.metadata)
+        else:
+            json.dumps(result.metadata, default=asdict, ensure_ascii=False)
+    except TypeError:
+        return False
+    return True
 
-    export_data = []
+
+def _export_rows(results):
+    """逐条生成导出记录"""
     for result_item in results:
         if isinstance(result_item, dict) and "result" in result_item:
             # 验证测试结果
-            export_data.append({
+            yield {
                 "test_id": result_item["result"].task_id,
-                "category": result_item["test_case"]["category"],
-                "task_text": result_item["test_case"]["text"],
-                "expected_mode": result_item["test_case"]["expected_mode"].value,
+                "category": result_item["test_case"].category,
+                "task_text": result_item["test_case"].text,
+                "expected_mode": result_item["test_case"].expected_mode.value,
                 "actual_mode": result_item["result"].reasoning_mode.value,
                 "is_correct": result_item["is_correct"],
                 "confidence_score": result_item["result"].confidence_score,
                 "execution_time": result_item["result"].execution_time,
                 "complexity_score": result_item["result"].metadata["complexity_score"]
-            })
+            }
         else:
             # 基准测试结果
-            export_data.append({
+            yield {
                 "test_id": result_item.task_id,
                 "reasoning_mode": result_item.reasoning_mode.value,
                 "execution_time": result_item.execution_time,
                 "confidence_score": result_item.confidence_score,
                 "complexity_score": result_item.metadata["complexity_score"],
                 "task_type": result_item.metadata["task_type"]
-            })
+            }
+
+
+def _dumps_row(row) -> bytes:
+    """序列化单条记录为UTF-8字节（orjson不可用时回退到标准库）"""
+    if orjson is not None:
+        return orjson.dumps(row)
+    return json.dumps(row, ensure_ascii=False).encode('utf-8')
+
 
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(export_data, f, ensure_ascii=False, indent=2)
+def export_test_results(results, filename="test_results.json"):
+    """导出测试结果到JSON文件（逐条序列化写出，每条记录占一行）"""
+
+    with open(filename, 'wb') as f:
+        f.write(b"[")
+        separator = b"\n  "
+        for row in _export_rows(results):
+            f.write(separator)
+            f.write(_dumps_row(row))
+            separator = b",\n  "
+        f.write(b"\n]\n")
 
     print(f"测试结果已导出到: {filename}")
 
@@ -322,15 +375,21 @@ if __name__ == "__main__":
     print("基于《大语言模型的内部推理与外部输出差异性研究》")
     print("=" * 60)
 
+    # 所有测试共用一个系统实例（关键词匹配器只初始化一次，特征缓存在各测试间共享）
+    system = AdaptiveReasoningSystem()
+
     # 运行所有测试
     print("\n1. 运行DeepSeek-V3验证测试...")
-    validation_results = run_deepseek_validation_tests()
+    validation_results = run_deepseek_validation_tests(system)
 
     print("\n2. 运行性能基准测试...")
-    benchmark_results = run_performance_benchmark()
+    benchmark_results = run_performance_benchmark(system)
 
+    # 演示结尾输出的系统统计只反映演示本身
     print("\n3. 运行自适应优化演示...")
-    run_adaptive_optimization_demo()
+    system.reset_statistics()
+    run_adaptive_optimization_demo(system)
+    system.close()
 
     # 导出结果
     print("\n4. 导出测试结果...")